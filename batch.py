@@ -0,0 +1,281 @@
+"""
+AI Pathfinder - Batch Solver
+Spreads (grid, start, target, algorithm) jobs over a process pool.
+Grids travel to the workers once, as shared-memory occupancy buffers, and
+results stream back in completion order as they finish.
+
+    python batch.py --random 200x200 --mazes 50 --queries 20 --workers 4
+    python batch.py --maps a.txt b.txt --queries 100 -a BFS -a UCS --out res.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+from mazes import GENERATORS, generate_many
+from pathfinder import ALGORITHMS, DYN_WALL, FREE, Grid, load_map, solve
+
+
+# ─────────────────────────────────────────────
+#  SHARED GRIDS
+# ─────────────────────────────────────────────
+class SharedGrids:
+    """Publishes grids as shared-memory buffers; use as a context manager.
+
+    ``descriptors`` is what workers need to attach: key -> (shm name, rows,
+    cols, start, target). The segments are unlinked on exit.
+    """
+
+    def __init__(self, grids):
+        self.segments = {}
+        self.descriptors = {}
+        for key, grid in grids.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(1, grid.size))
+            shm.buf[:grid.size] = grid.cells
+            self.segments[key] = shm
+            self.descriptors[key] = (shm.name, grid.rows, grid.cols,
+                                     grid.start, grid.target)
+
+    def close(self):
+        for shm in self.segments.values():
+            shm.close()
+            shm.unlink()
+        self.segments.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ─────────────────────────────────────────────
+#  WORKER SIDE
+# ─────────────────────────────────────────────
+_descriptors = {}
+_grids = {}
+
+def _init_worker(descriptors):
+    global _descriptors
+    _descriptors = descriptors
+    _grids.clear()
+
+def _worker_grid(key):
+    """Attach to a shared grid once per worker and keep a private copy."""
+    grid = _grids.get(key)
+    if grid is None:
+        name, rows, cols, start, target = _descriptors[key]
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            grid = Grid(rows, cols)
+            grid.cells[:] = shm.buf[:grid.size]
+        finally:
+            shm.close()
+        grid.start, grid.target = start, target
+        _grids[key] = grid
+    return grid
+
+def job_seed(base_seed, index):
+    """Per-job seed that depends only on the batch seed and job index."""
+    return (base_seed * 1_000_003 + index) & 0x7FFFFFFF
+
+def _spawn_seeded(grid, k, rng):
+    """Spawn up to ``k`` dynamic walls chosen only by ``rng``.
+
+    Grid.spawn_dynamic_many draws from the free-cell index, whose order
+    depends on the worker's history; rejection sampling over cell ids keeps
+    a job's obstacles identical whichever worker runs it.
+    """
+    skip = (grid.start_id, grid.target_id)
+    spawned = []
+    for _ in range(k):
+        if grid.free_count() <= len(skip):
+            break
+        while True:
+            i = rng.randrange(grid.size)
+            if not grid.cells[i] and i not in skip:
+                break
+        grid.set_cell(i, DYN_WALL)
+        spawned.append(i)
+    return spawned
+
+def _run_job(index, job, base_seed, include_path, max_steps):
+    key, start, target, algorithm = job[:4]
+    opts = dict(job[4]) if len(job) > 4 else {}
+    obstacles = opts.pop("obstacles", 0)
+    grid = _worker_grid(key)
+    default_start, default_target = grid.start, grid.target
+    grid.start  = tuple(start) if start is not None else default_start
+    grid.target = tuple(target) if target is not None else default_target
+
+    seed = job_seed(base_seed, index)
+    default_rng, grid.rng = grid.rng, random.Random(seed)
+    spawned = _spawn_seeded(grid, obstacles, random.Random(seed))
+    try:
+        res = solve(grid, algorithm, max_steps=max_steps, **opts)
+    finally:
+        for i in spawned:
+            grid.set_cell(i, FREE)
+        grid.start, grid.target = default_start, default_target
+        grid.rng = default_rng
+
+    res.update(index=index, grid=key, start=grid_cell(start, default_start),
+               target=grid_cell(target, default_target), seed=seed,
+               worker=os.getpid())
+    if not include_path:
+        del res["path"]
+    return res
+
+def grid_cell(cell, default):
+    return list(cell) if cell is not None else list(default)
+
+def _run_chunk(chunk, base_seed, include_path, max_steps):
+    return [_run_job(i, job, base_seed, include_path, max_steps) for i, job in chunk]
+
+
+# ─────────────────────────────────────────────
+#  DRIVER
+# ─────────────────────────────────────────────
+def _chunks(jobs, size):
+    chunk = []
+    for item in enumerate(jobs):
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_batch(grids, jobs, workers=None, chunksize=16, window=None, seed=0,
+              include_path=False, max_steps=None):
+    """Solve ``jobs`` on a process pool and yield results as they finish.
+
+    ``grids`` maps a key to a Grid; each job is ``(key, start, target,
+    algorithm[, opts])`` with start/target as (r, c) or None for the grid's
+    own. ``opts`` go to solve(); ``obstacles=K`` first spawns K dynamic
+    walls from the job's seed. ``jobs`` may be a lazy iterator: at most
+    ``window`` chunks of ``chunksize`` jobs are in flight at once, so a huge
+    corpus never sits in memory. Results carry their job ``index``.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    with SharedGrids(grids) as shared, \
+         ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(shared.descriptors,)) as pool:
+        pending = set()
+        chunks = _chunks(jobs, chunksize)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_run_chunk, chunk, seed,
+                                        include_path, max_steps))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield from fut.result()
+
+
+# ─────────────────────────────────────────────
+#  CLI
+# ─────────────────────────────────────────────
+def _parse_size(text):
+    rows, cols = text.lower().split("x")
+    return int(rows), int(cols)
+
+def random_queries(grid, count, rng):
+    """``count`` random (start, target) pairs of free cells."""
+    free = list(grid.iter_ids(FREE))
+    if len(free) < 2:
+        return []
+    pairs = []
+    for _ in range(count):
+        s, t = rng.sample(free, 2)
+        pairs.append((grid.cell(s), grid.cell(t)))
+    return pairs
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Solve many pathfinding jobs in parallel.")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--maps", nargs="+", help="text map files")
+    src.add_argument("--random", type=_parse_size, metavar="ROWSxCOLS",
+                     help="generate random mazes of this size")
+    p.add_argument("--mazes", type=int, default=10, help="number of random mazes")
+    p.add_argument("--density", type=float, default=0.22)
+    p.add_argument("--maze", choices=list(GENERATORS),
+                   help="generate --random maps with mazes.py (connected, "
+                        "reproducible per --seed) instead of random walls")
+    p.add_argument("--queries", type=int, default=0,
+                   help="random start/target pairs per map (0: map's own S/T)")
+    p.add_argument("-a", "--algorithm", action="append", choices=ALGORITHMS,
+                   help="repeatable (default: BFS)")
+    p.add_argument("--obstacles", type=int, default=0,
+                   help="dynamic obstacles spawned per job before solving")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--chunksize", type=int, default=16)
+    p.add_argument("--window", type=int, default=None,
+                   help="max chunks in flight (default 2 x workers)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--max-steps", type=int, default=None)
+    p.add_argument("--paths", action="store_true", help="include paths in output")
+    p.add_argument("--out", help="write JSON lines here instead of stdout")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rng = random.Random(args.seed)
+    if args.maps:
+        grids = {path: load_map(path) for path in args.maps}
+    else:
+        grids = {}
+        if args.maze:
+            params = {"density": args.density} if args.maze == "uniform" else {}
+            mazes = generate_many(args.maze, args.mazes, *args.random, seed=args.seed,
+                                  connected=True, **params)
+            grids = {f"maze{k}": grid for k, grid in enumerate(mazes)}
+        else:
+            for k in range(args.mazes):
+                grid = Grid(*args.random)
+                grid.random_walls(args.density, rng=random.Random(rng.random()))
+                grids[f"maze{k}"] = grid
+    algorithms = args.algorithm or ["BFS"]
+    opts = {"obstacles": args.obstacles} if args.obstacles else {}
+
+    def jobs():
+        for key, grid in grids.items():
+            pairs = random_queries(grid, args.queries, rng) if args.queries else [(None, None)]
+            for start, target in pairs:
+                for alg in algorithms:
+                    yield (key, start, target, alg, opts)
+
+    out = open(args.out, "w") if args.out else sys.stdout
+    t0 = time.perf_counter()
+    count = found = 0
+    try:
+        for res in run_batch(grids, jobs(), workers=args.workers,
+                             chunksize=args.chunksize, window=args.window,
+                             seed=args.seed, include_path=args.paths,
+                             max_steps=args.max_steps):
+            count += 1
+            found += res["found"]
+            out.write(json.dumps(res) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"{count} jobs, {found} solved in {elapsed:.2f}s "
+          f"({count/elapsed if elapsed else 0:.0f} jobs/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
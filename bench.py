@@ -0,0 +1,339 @@
+"""
+AI Pathfinder - Benchmark Suite
+Sweeps the search algorithms over grid sizes, wall densities and seeds,
+writes machine-readable JSON and optionally compares against a baseline.
+
+    python bench.py --sizes 18x20,200x200 --densities 0.1,0.3 --seeds 1,2,3
+    python bench.py --out new.json --baseline old.json
+    python bench.py --scen den520d.map.scen --scen-limit 100 --no-memory
+    python bench.py --jump-report --sizes 200x200 --densities 0,0.1,0.3
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from maps import load_grid, read_scen
+from pathfinder import (ALGORITHMS, BACKEND_NAMES, FREE, SEARCH_BACKENDS, Grid,
+                        SearchState, make_search, path_cost, solve)
+
+DEFAULT_SIZES     = [(18, 20), (100, 100), (500, 500)]
+DEFAULT_DENSITIES = [0.1, 0.22, 0.35]
+DEFAULT_SEEDS     = [1, 2, 3]
+DEFAULT_MAX_STEPS = 2_000_000      # keeps IDDFS on large maps bounded
+MAX_SIDE          = 2000
+
+# Record fields that identify one benchmark case (scenario cases add "map"
+# and use the scenario's index as the seed)
+KEY_FIELDS = ("algorithm", "rows", "cols", "density", "seed", "backend", "map")
+KEY_DEFAULTS = {"backend": "generator", "map": None}
+
+
+# ─────────────────────────────────────────────
+#  CASES
+# ─────────────────────────────────────────────
+def make_grid(rows, cols, density, seed):
+    """Seeded random maze; the same arguments always give the same walls."""
+    grid = Grid(rows, cols)
+    grid.random_walls(density, rng=random.Random(seed))
+    grid.components()       # built per map, not per timed search
+    return grid
+
+def profile_run(grid, algorithm, max_steps, backend=None):
+    """Second, untimed pass that tracks peak frontier and peak memory."""
+    state = SearchState(grid)
+    peak_frontier = steps = 0
+    tracemalloc.start()
+    try:
+        for step in make_search(grid, algorithm, backend):
+            state.apply(step)
+            steps += 1
+            if len(state.frontier) > peak_frontier:
+                peak_frontier = len(state.frontier)
+            if step.path or steps >= max_steps:
+                break
+        _, peak_mem = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_frontier, peak_mem
+
+def run_case(grid, algorithm, density, seed, max_steps, repeat=1, memory=True,
+             backend=None):
+    backend = backend if backend in SEARCH_BACKENDS.get(algorithm, ()) else None
+    best = None
+    for _ in range(repeat):
+        res = solve(grid, algorithm, max_steps=max_steps, backend=backend)
+        if best is None or res["elapsed"] < best["elapsed"]:
+            best = res
+    record = {
+        "algorithm": algorithm,
+        "rows":      grid.rows,
+        "cols":      grid.cols,
+        "density":   density,
+        "seed":      seed,
+        "backend":   backend or "generator",
+        "found":     best["found"],
+        "truncated": not best["found"] and best["steps"] >= max_steps,
+        "cost":      best["cost"],
+        "length":    best["length"],
+        "steps":     best["steps"],
+        "expanded":  best["expanded"],
+        "time_s":    round(best["elapsed"], 6),
+        "peak_frontier": None,
+        "peak_mem_bytes": None,
+    }
+    if memory:
+        record["peak_frontier"], record["peak_mem_bytes"] = \
+            profile_run(grid, algorithm, max_steps, backend)
+    return record
+
+def sweep(algorithms, sizes, densities, seeds, max_steps=DEFAULT_MAX_STEPS,
+          repeat=1, memory=True, progress=None, backend=None):
+    """Run every (size, density, seed, algorithm) case; returns records."""
+    records = []
+    for rows, cols in sizes:
+        for density in densities:
+            for seed in seeds:
+                grid = make_grid(rows, cols, density, seed)
+                for alg in algorithms:
+                    rec = run_case(grid, alg, density, seed, max_steps,
+                                   repeat, memory, backend)
+                    records.append(rec)
+                    if progress:
+                        progress(rec)
+    return records
+
+def scen_sweep(algorithms, scen_paths, max_steps=DEFAULT_MAX_STEPS, repeat=1,
+               memory=True, progress=None, backend=None, limit=None, map_dir=None):
+    """Run MovingAI scenario files against ``algorithms``; returns records.
+
+    Each map is loaded once. Records carry the map path, the scenario's
+    bucket and MovingAI's optimal length next to our cost.
+    """
+    records = []
+    for scen in scen_paths:
+        scenarios = read_scen(scen, map_dir)[:limit]
+        grids = {}
+        for index, sc in enumerate(scenarios):
+            if sc["map"] not in grids:
+                grid = load_grid(sc["map"])
+                grid.components()
+                grids[sc["map"]] = grid, round(1 - grid.cells.count(FREE) / grid.size, 4)
+            grid, density = grids[sc["map"]]
+            grid.start, grid.target = sc["start"], sc["target"]
+            for alg in algorithms:
+                rec = run_case(grid, alg, density, index, max_steps,
+                               repeat, memory, backend)
+                rec.update(map=sc["map"], bucket=sc["bucket"], optimal=sc["optimal"])
+                records.append(rec)
+                if progress:
+                    progress(rec)
+    return records
+
+
+def count_run(grid, algorithm, backend=None, max_steps=DEFAULT_MAX_STEPS):
+    """(expanded cells, frontier pushes, seconds, path cost) of one search."""
+    expanded = pushes = steps = 0
+    path = []
+    t0 = time.perf_counter()
+    for step in make_search(grid, algorithm, backend):
+        expanded += len(step.explored)
+        pushes += len(step.added)
+        steps += 1
+        if step.path or steps >= max_steps:
+            path = step.path
+            break
+    return expanded, pushes, time.perf_counter() - t0, path_cost(path) if path else None
+
+def jump_report(sizes, densities, seeds, max_steps=DEFAULT_MAX_STEPS, progress=None):
+    """Jump-point UCS against plain ucs_gen on every (size, density, seed).
+
+    Both must find the same cost; the records give the expansions, pushes
+    and times of each and the fraction of expansions / pushes pruned.
+    """
+    records = []
+    for rows, cols in sizes:
+        for density in densities:
+            for seed in seeds:
+                grid = make_grid(rows, cols, density, seed)
+                plain = count_run(grid, "UCS", None, max_steps)
+                jump = count_run(grid, "UCS", "jump", max_steps)
+                if (plain[3] is None) != (jump[3] is None) or (
+                        plain[3] is not None and abs(plain[3] - jump[3]) > 1e-9):
+                    raise AssertionError(f"{rows}x{cols} d={density} seed={seed}: "
+                                         f"cost {plain[3]} != {jump[3]}")
+                rec = {
+                    "rows": rows, "cols": cols, "density": density, "seed": seed,
+                    "cost": round(plain[3], 4) if plain[3] is not None else None,
+                    "expanded": plain[0], "pushes": plain[1], "time_s": round(plain[2], 6),
+                    "jump_expanded": jump[0], "jump_pushes": jump[1],
+                    "jump_time_s": round(jump[2], 6),
+                    "expanded_cut": 1 - jump[0] / plain[0] if plain[0] else 0.0,
+                    "pushes_cut":   1 - jump[1] / plain[1] if plain[1] else 0.0,
+                }
+                records.append(rec)
+                if progress:
+                    progress(rec)
+    return records
+
+
+# ─────────────────────────────────────────────
+#  BASELINE COMPARISON
+# ─────────────────────────────────────────────
+def case_key(rec):
+    return tuple(rec.get(f, KEY_DEFAULTS[f]) if f in KEY_DEFAULTS else rec[f]
+                 for f in KEY_FIELDS)
+
+def compare(records, baseline, tolerance=0.25, min_time=0.005):
+    """Regressions of ``records`` against ``baseline`` records.
+
+    A case regresses when it got slower by more than ``tolerance``
+    (relative), expanded more nodes, or its path cost / found flag changed.
+    Cases faster than ``min_time`` seconds are too noisy to time-compare.
+    """
+    old = {case_key(r): r for r in baseline}
+    problems = []
+    for rec in records:
+        prev = old.get(case_key(rec))
+        if prev is None:
+            continue
+        name = "{algorithm} {rows}x{cols} d={density} seed={seed}".format(**rec)
+        if rec.get("map"):
+            name += f" map={rec['map']}"
+        if rec["found"] != prev["found"] or rec["cost"] != prev["cost"]:
+            problems.append(f"{name}: result changed "
+                            f"(cost {prev['cost']} -> {rec['cost']})")
+        if rec["expanded"] > prev["expanded"]:
+            problems.append(f"{name}: expanded {prev['expanded']} -> {rec['expanded']}")
+        if (max(prev["time_s"], rec["time_s"]) >= min_time and
+                rec["time_s"] > prev["time_s"] * (1 + tolerance)):
+            problems.append(f"{name}: time {prev['time_s']:.4f}s -> {rec['time_s']:.4f}s "
+                            f"(x{rec['time_s']/prev['time_s']:.2f})")
+    return problems
+
+
+# ─────────────────────────────────────────────
+#  CLI
+# ─────────────────────────────────────────────
+def _parse_sizes(text):
+    sizes = []
+    for part in text.split(","):
+        rows, cols = (int(v) for v in part.lower().split("x"))
+        if not (1 <= rows <= MAX_SIDE and 1 <= cols <= MAX_SIDE):
+            raise argparse.ArgumentTypeError(f"size {part} outside 1..{MAX_SIDE}")
+        sizes.append((rows, cols))
+    return sizes
+
+def _parse_list(kind):
+    return lambda text: [kind(v) for v in text.split(",")]
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Benchmark the pathfinder search algorithms.")
+    p.add_argument("--algorithms", type=_parse_list(str), default=ALGORITHMS,
+                   help="comma separated (default: all six)")
+    p.add_argument("--sizes", type=_parse_sizes, default=DEFAULT_SIZES,
+                   help="comma separated ROWSxCOLS, up to 2000x2000")
+    p.add_argument("--densities", type=_parse_list(float), default=DEFAULT_DENSITIES)
+    p.add_argument("--seeds", type=_parse_list(int), default=DEFAULT_SEEDS)
+    p.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+                   help="per-run step cap; capped runs are marked truncated")
+    p.add_argument("--repeat", type=int, default=1, help="timed repeats, best kept")
+    p.add_argument("--backend", choices=BACKEND_NAMES,
+                   help="alternative engine where an algorithm has one")
+    p.add_argument("--scen", action="append", metavar="FILE",
+                   help="run a MovingAI .scen file instead of random mazes; repeatable")
+    p.add_argument("--scen-limit", type=int, metavar="N",
+                   help="only the first N scenarios of each file")
+    p.add_argument("--map-dir", help="directory holding the maps the .scen files name")
+    p.add_argument("--jump-report", action="store_true",
+                   help="compare jump-point UCS with plain UCS (expansions, pushes)")
+    p.add_argument("--no-memory", action="store_true",
+                   help="skip the peak frontier / tracemalloc pass")
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--baseline", help="compare against a previous results JSON")
+    p.add_argument("--tolerance", type=float, default=0.25,
+                   help="allowed relative slowdown vs. baseline (default 0.25)")
+    p.add_argument("--min-time", type=float, default=0.005,
+                   help="ignore timing of cases faster than this many seconds")
+    p.add_argument("-q", "--quiet", action="store_true")
+    return p
+
+def _print_record(rec):
+    cost = f"{rec['cost']:.1f}" if rec["found"] else ("cap" if rec["truncated"] else "-")
+    mem = rec["peak_mem_bytes"]
+    mem = f"{mem/1024:.0f}K" if mem is not None else "-"
+    front = rec["peak_frontier"] if rec["peak_frontier"] is not None else "-"
+    print(f"{rec['algorithm']:<14}{rec['rows']:>5}x{rec['cols']:<5}{rec['density']:>6.2f}"
+          f"{rec['seed']:>6}{cost:>9}{rec['expanded']:>10}{front:>9}{mem:>9}"
+          f"{rec['time_s']*1000:>11.2f}")
+
+def _print_jump(rec):
+    print(f"{rec['rows']:>5}x{rec['cols']:<5}{rec['density']:>6.2f}{rec['seed']:>6}"
+          f"{rec['expanded']:>10}{rec['jump_expanded']:>10}{rec['expanded_cut']:>8.1%}"
+          f"{rec['pushes']:>10}{rec['jump_pushes']:>10}{rec['pushes_cut']:>8.1%}"
+          f"{rec['time_s']*1000:>10.1f}{rec['jump_time_s']*1000:>10.1f}")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.jump_report:
+        if not args.quiet:
+            print(f"{'Size':^11}{'Dens':>6}{'Seed':>6}{'Expanded':>10}{'Jump':>10}{'Cut':>8}"
+                  f"{'Pushes':>10}{'Jump':>10}{'Cut':>8}{'ms':>10}{'Jump ms':>10}")
+        records = jump_report(args.sizes, args.densities, args.seeds, args.max_steps,
+                              progress=None if args.quiet else _print_jump)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump({"results": records}, f, indent=2)
+        return 0
+    unknown = [a for a in args.algorithms if a not in ALGORITHMS]
+    if unknown:
+        print(f"unknown algorithm(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    if not args.quiet:
+        print(f"{'Algorithm':<14}{'Size':^11}{'Dens':>6}{'Seed':>6}{'Cost':>9}"
+              f"{'Expanded':>10}{'Frontier':>9}{'PeakMem':>9}{'ms':>11}")
+    progress = None if args.quiet else _print_record
+    if args.scen:
+        records = scen_sweep(args.algorithms, args.scen, max_steps=args.max_steps,
+                             repeat=args.repeat, memory=not args.no_memory,
+                             backend=args.backend, progress=progress,
+                             limit=args.scen_limit, map_dir=args.map_dir)
+    else:
+        records = sweep(args.algorithms, args.sizes, args.densities, args.seeds,
+                        max_steps=args.max_steps, repeat=args.repeat,
+                        memory=not args.no_memory, backend=args.backend,
+                        progress=progress)
+
+    report = {
+        "meta": {
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "max_steps": args.max_steps,
+            "repeat":    args.repeat,
+        },
+        "results": records,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        problems = compare(records, baseline, args.tolerance, args.min_time)
+        for line in problems:
+            print("REGRESSION " + line)
+        if problems:
+            return 1
+        print("no regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
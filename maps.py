@@ -0,0 +1,283 @@
+"""
+AI Pathfinder - Map Formats
+Loads and saves grids in the standard MovingAI benchmark format and in two
+native formats, and reads MovingAI scenario files:
+
+  .map   MovingAI map ("type octile", "height", "width", "map", then rows)
+  .pfm   native byte plane - one byte per cell plus a small trailer; opened
+         with mmap (copy-on-write), so huge maps open instantly and page in
+         as the searches touch them
+  .pfb   packed bitmap - one bit per cell, 8x smaller, for interchange
+  .scen  MovingAI scenarios: start / goal pairs with their optimal lengths
+
+Anything else is a text map for Grid.from_text.
+
+    python maps.py convert den520d.map den520d.pfm
+    python maps.py info den520d.pfm
+    python bench.py --scen den520d.map.scen --scen-limit 200
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+from pathfinder import FREE, WALL, Grid, _numpy
+
+PFM_MAGIC = b"PFMAP001"
+PFB_MAGIC = b"PFBITS01"
+
+# rows, cols, start (r, c), target (r, c), magic
+_PFM_TRAILER = struct.Struct("<2I4i8s")
+_PFB_HEADER  = struct.Struct("<8s2I4i")
+
+_CHUNK = 1 << 24        # bytes per slice when scanning a mapped plane
+
+# MovingAI terrain: '.', 'G' and 'S' (swamp) are passable, '@', 'O', 'T'
+# (trees) and 'W' (water) are not.
+_MOVINGAI_PASSABLE = b".GS"
+_FROM_MOVINGAI = bytes(FREE if bytes([b]) in _MOVINGAI_PASSABLE else WALL
+                       for b in range(256))
+_TO_MOVINGAI = b"." + b"@" * 255
+_WALL_BIT = bytes([0]) + bytes([1]) * 255       # translate(): 1 unless FREE
+
+
+# ─────────────────────────────────────────────
+#  MAPPED CELLS
+# ─────────────────────────────────────────────
+class MappedCells(mmap.mmap):
+    """Copy-on-write mapping of a byte plane, usable as Grid.cells.
+
+    mmap already indexes, slices and assigns like a bytearray; this adds
+    the int arguments and the count / translate methods the grid uses.
+    Edits stay in memory - save_native writes them back out.
+    """
+
+    def find(self, sub, *args):
+        return super().find(bytes((sub,)) if isinstance(sub, int) else sub, *args)
+
+    def rfind(self, sub, *args):
+        return super().rfind(bytes((sub,)) if isinstance(sub, int) else sub, *args)
+
+    def count(self, sub):
+        sub = bytes((sub,)) if isinstance(sub, int) else sub
+        return sum(self[i:i+_CHUNK].count(sub) for i in range(0, len(self), _CHUNK))
+
+    def translate(self, table):
+        return b"".join(self[i:i+_CHUNK].translate(table)
+                        for i in range(0, len(self), _CHUNK))
+
+
+def _place_endpoints(grid, start=None, target=None):
+    """Use the given endpoints, else keep the defaults if they are free,
+    else fall back to the first and last free cells."""
+    cells = grid.cells
+    if start is None and not grid.is_free(*grid.start):
+        i = cells.find(FREE)
+        start = grid.cell(i) if i >= 0 else None
+    if target is None and not grid.is_free(*grid.target):
+        i = cells.rfind(FREE)
+        target = grid.cell(i) if i >= 0 else None
+    if start is not None:
+        grid.start = start
+    if target is not None:
+        grid.target = target
+    return grid
+
+
+# ─────────────────────────────────────────────
+#  NATIVE BYTE PLANE (.pfm)
+# ─────────────────────────────────────────────
+def save_native(grid, path):
+    # Written aside and renamed: the grid may be a mapping of ``path`` itself.
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(grid.cells)
+        f.write(_PFM_TRAILER.pack(grid.rows, grid.cols, *grid.start, *grid.target,
+                                  PFM_MAGIC))
+    os.replace(tmp, path)
+
+def open_native(path):
+    """Grid whose cells are a copy-on-write mmap of the file."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        length = f.tell()
+        if length < _PFM_TRAILER.size:
+            raise ValueError(f"{path}: too short for a map")
+        f.seek(length - _PFM_TRAILER.size)
+        rows, cols, sr, sc, tr, tc, magic = _PFM_TRAILER.unpack(f.read(_PFM_TRAILER.size))
+        if magic != PFM_MAGIC:
+            raise ValueError(f"{path}: not a native map file")
+        if not rows or not cols or rows * cols + _PFM_TRAILER.size != length:
+            raise ValueError(f"{path}: {rows}x{cols} does not match the file size")
+        cells = MappedCells(f.fileno(), rows * cols, access=mmap.ACCESS_COPY)
+    grid = Grid(rows, cols, cells=cells)
+    grid.start, grid.target = (sr, sc), (tr, tc)
+    return grid
+
+
+# ─────────────────────────────────────────────
+#  PACKED BITMAP (.pfb)
+# ─────────────────────────────────────────────
+# Bit set = blocked, most significant bit first (numpy.packbits order).
+_UNPACK = [bytes((b >> k) & 1 for k in range(7, -1, -1)) for b in range(256)]
+_PACK   = {bits: b for b, bits in enumerate(_UNPACK)}
+
+def pack_bits(cells):
+    """One bit per cell of ``cells``: set where the cell is not FREE."""
+    np = _numpy()
+    if np is not None:
+        plane = np.frombuffer(cells, dtype=np.uint8)
+        return np.packbits(plane != FREE).tobytes()
+    bits = bytes(cells.translate(_WALL_BIT))
+    bits += bytes(-len(bits) % 8)
+    return bytes(_PACK[bits[i:i+8]] for i in range(0, len(bits), 8))
+
+def unpack_bits(data, size):
+    """Byte plane of ``size`` FREE / WALL cells from packed bits."""
+    np = _numpy()
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=size)
+        return bytearray(bits.tobytes())    # WALL == 1
+    return bytearray(b"".join(_UNPACK[b] for b in data)[:size])
+
+def save_bitmap(grid, path):
+    with open(path, "wb") as f:
+        f.write(_PFB_HEADER.pack(PFB_MAGIC, grid.rows, grid.cols,
+                                 *grid.start, *grid.target))
+        f.write(pack_bits(grid.cells))
+
+def load_bitmap(path):
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if len(buf) < _PFB_HEADER.size:
+                raise ValueError(f"{path}: too short for a map")
+            magic, rows, cols, sr, sc, tr, tc = _PFB_HEADER.unpack_from(buf)
+            if magic != PFB_MAGIC:
+                raise ValueError(f"{path}: not a packed bitmap map")
+            size = rows * cols
+            if not size or len(buf) - _PFB_HEADER.size != (size + 7) // 8:
+                raise ValueError(f"{path}: {rows}x{cols} does not match the file size")
+            cells = unpack_bits(buf[_PFB_HEADER.size:], size)
+    grid = Grid(rows, cols, cells=cells)
+    grid.start, grid.target = (sr, sc), (tr, tc)
+    return grid
+
+
+# ─────────────────────────────────────────────
+#  MOVINGAI (.map / .scen)
+# ─────────────────────────────────────────────
+def read_movingai(path):
+    """Grid from a MovingAI .map; endpoints default to free cells."""
+    with open(path, "rb") as f:
+        data = f.read()
+    head, sep, body = data.partition(b"\nmap")
+    if not sep:
+        raise ValueError(f"{path}: missing 'map' line")
+    fields = dict(line.split(None, 1) for line in head.split(b"\n") if line.strip())
+    try:
+        rows, cols = int(fields[b"height"]), int(fields[b"width"])
+    except (KeyError, ValueError):
+        raise ValueError(f"{path}: bad height / width header") from None
+    lines = body.split()
+    if len(lines) != rows or any(len(ln) != cols for ln in lines):
+        raise ValueError(f"{path}: map body is not {rows} rows of {cols}")
+    grid = Grid(rows, cols, cells=bytearray(b"".join(lines).translate(_FROM_MOVINGAI)))
+    return _place_endpoints(grid)
+
+def write_movingai(grid, path):
+    rows = (bytes(grid.cells[r*grid.cols:(r+1)*grid.cols]).translate(_TO_MOVINGAI)
+            for r in range(grid.rows))
+    with open(path, "wb") as f:
+        f.write(b"type octile\nheight %d\nwidth %d\nmap\n" % (grid.rows, grid.cols))
+        for row in rows:
+            f.write(row + b"\n")
+
+def read_scen(path, map_dir=None):
+    """Scenarios of a MovingAI .scen file as dicts, in file order.
+
+    MovingAI writes (x, y) = (column, row); ``start`` / ``target`` are
+    converted to (r, c). ``map`` is looked up by file name in ``map_dir``,
+    else relative to the .scen file (or next to it).
+    ``optimal`` is MovingAI's octile length (diagonals sqrt 2, no corner
+    cutting), so it is a reference, not our 1.0 / 1.4 cost.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    def locate(name):
+        if map_dir is not None:
+            return os.path.join(map_dir, os.path.basename(name))
+        full = os.path.join(base, name)
+        return full if os.path.exists(full) else os.path.join(base, os.path.basename(name))
+    scenarios = []
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            parts = line.split("\t") if "\t" in line else line.split()
+            if not parts or not parts[0].strip() or parts[0].startswith("version"):
+                continue
+            if len(parts) < 9:
+                raise ValueError(f"{path}:{n}: expected 9 fields, got {len(parts)}")
+            bucket, name, width, height, sx, sy, gx, gy, optimal = parts[:9]
+            scenarios.append({
+                "bucket":  int(bucket),
+                "map":     locate(name.strip()),
+                "width":   int(width),
+                "height":  int(height),
+                "start":   (int(sy), int(sx)),
+                "target":  (int(gy), int(gx)),
+                "optimal": float(optimal),
+            })
+    return scenarios
+
+
+# ─────────────────────────────────────────────
+#  DISPATCH
+# ─────────────────────────────────────────────
+_LOADERS = {".map": read_movingai, ".pfm": open_native, ".pfb": load_bitmap}
+_SAVERS  = {".map": write_movingai, ".pfm": save_native, ".pfb": save_bitmap}
+
+def load_grid(path):
+    """Grid from any supported map file, chosen by extension."""
+    load = _LOADERS.get(os.path.splitext(path)[1].lower())
+    if load is None:
+        with open(path) as f:
+            return Grid.from_text(f.read())
+    return load(path)
+
+def save_grid(grid, path):
+    save = _SAVERS.get(os.path.splitext(path)[1].lower())
+    if save is None:
+        with open(path, "w") as f:
+            f.write(grid.to_text())
+    else:
+        save(grid, path)
+
+
+# ─────────────────────────────────────────────
+#  CLI
+# ─────────────────────────────────────────────
+def build_parser():
+    p = argparse.ArgumentParser(description="Convert and inspect pathfinder map files.")
+    sub = p.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="rewrite a map in the format of OUT's extension")
+    conv.add_argument("src")
+    conv.add_argument("out")
+    info = sub.add_parser("info", help="size, walls and endpoints of a map")
+    info.add_argument("map")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "convert":
+        save_grid(load_grid(args.src), args.out)
+        return 0
+    grid = load_grid(args.map)
+    walls = grid.size - grid.cells.count(FREE)
+    print(f"{args.map}: {grid.rows}x{grid.cols}, {grid.size} cells, "
+          f"{walls} blocked ({walls / grid.size:.1%})")
+    print(f"start {grid.start}  target {grid.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+AI Pathfinder - Maze Generation
+Seeded generators that write straight into the byte plane of a Grid:
+
+  uniform    independent walls at a given density
+  division   recursive division - walls with one passage each, a perfect
+             maze of chambers
+  caves      cellular-automaton caves smoothed from random noise
+  rooms      rectangular rooms joined by L-shaped corridors
+
+NumPy's random.Generator drives them when it is installed (uniform and caves
+are then whole-array operations); otherwise random.Random does, in plain
+Python. The same seed gives the same map on the same backend. Map ``i`` of
+a bulk run depends only on (seed, i), so any one map of a corpus can be
+rebuilt on its own.
+
+    python mazes.py caves 512x512 --count 1000 --seed 7 --connected --out corpus/
+    python mazes.py rooms 40x60 --seed 3 -p rooms=12
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import deque
+
+from maps import save_grid
+from pathfinder import DIRECTIONS, FREE, WALL, Grid, _numpy, _parse_size
+
+
+# ─────────────────────────────────────────────
+#  RANDOM SOURCES
+# ─────────────────────────────────────────────
+def make_rng(seed=None, index=None):
+    """numpy.random.Generator for ``seed`` (map ``index`` of a bulk run),
+    or random.Random without NumPy."""
+    np = _numpy()
+    if np is not None:
+        if index is None:
+            return np.random.default_rng(seed)
+        return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    if index is None:
+        return random.Random(seed)
+    return random.Random(f"{seed}/{index}")
+
+def _is_numpy(rng):
+    return hasattr(rng, "integers")
+
+def _scalar(rng):
+    """random.Random for generators that draw many single numbers, where
+    NumPy's per-call overhead dominates; seeded from ``rng``."""
+    return random.Random(int(rng.integers(1 << 62))) if _is_numpy(rng) else rng
+
+
+# ─────────────────────────────────────────────
+#  GENERATORS
+# ─────────────────────────────────────────────
+# Each takes (rows, cols, rng, **params) and returns a bytearray of
+# rows * cols FREE / WALL cells.
+def uniform(rows, cols, rng, density=0.22):
+    n = rows * cols
+    if _is_numpy(rng):
+        return bytearray((rng.random(n) < density).astype("uint8").tobytes())
+    rand = rng.random
+    return bytearray(WALL if rand() < density else FREE for _ in range(n))
+
+def division(rows, cols, rng, passages=1):
+    """Recursive division: walls on odd rows / columns, gaps on even ones,
+    so a later wall can never seal an earlier wall's passage."""
+    randint = _scalar(rng).randint
+    plane = bytearray(rows * cols)
+    chambers = [(0, 0, rows, cols)]
+    while chambers:
+        r0, c0, r1, c1 = chambers.pop()
+        h_slots = (r1 - r0 - 1) // 2      # odd rows strictly inside
+        v_slots = (c1 - c0 - 1) // 2
+        if not h_slots and not v_slots:
+            continue
+        if not (h_slots and v_slots):
+            horizontal = bool(h_slots)
+        elif r1 - r0 != c1 - c0:
+            horizontal = r1 - r0 > c1 - c0      # cut across the long side
+        else:
+            horizontal = bool(randint(0, 1))
+        if horizontal:
+            w = r0 + 1 + 2 * randint(0, h_slots - 1)
+            plane[w*cols + c0:w*cols + c1] = bytes([WALL]) * (c1 - c0)
+            for _ in range(passages):
+                plane[w*cols + c0 + 2 * randint(0, (c1 - c0 - 1) // 2)] = FREE
+            chambers += [(r0, c0, w, c1), (w + 1, c0, r1, c1)]
+        else:
+            w = c0 + 1 + 2 * randint(0, v_slots - 1)
+            plane[r0*cols + w:r1*cols + w:cols] = bytes([WALL]) * (r1 - r0)
+            for _ in range(passages):
+                plane[(r0 + 2 * randint(0, (r1 - r0 - 1) // 2))*cols + w] = FREE
+            chambers += [(r0, c0, r1, w), (r0, w + 1, r1, c1)]
+    return plane
+
+def caves(rows, cols, rng, fill=0.45, steps=4):
+    """Random fill smoothed by the 4-5 rule: a cell becomes wall with at
+    least 5 wall neighbours, or stays one with at least 4 (off-grid
+    counts as wall)."""
+    if _is_numpy(rng):
+        np = _numpy()
+        wall = rng.random((rows, cols)) < fill
+        for _ in range(steps):
+            padded = np.pad(wall, 1, constant_values=True).astype(np.uint8)
+            n = sum(padded[1+dr:rows+1+dr, 1+dc:cols+1+dc] for dr, dc in DIRECTIONS)
+            wall = np.where(wall, n >= 4, n >= 5)
+        return bytearray(wall.astype(np.uint8).tobytes())
+    plane = uniform(rows, cols, rng, fill)
+    for _ in range(steps):
+        nxt = bytearray(rows * cols)
+        for r in range(rows):
+            for c in range(cols):
+                n = 0
+                for dr, dc in DIRECTIONS:
+                    rr, cc = r + dr, c + dc
+                    if not (0 <= rr < rows and 0 <= cc < cols) or plane[rr*cols + cc]:
+                        n += 1
+                nxt[r*cols + c] = WALL if n >= (4 if plane[r*cols + c] else 5) else FREE
+        plane = nxt
+    return plane
+
+def rooms(rows, cols, rng, rooms=None, min_size=3, max_size=None, tries=None):
+    """Non-overlapping rooms carved from solid rock, each joined to the
+    next by an L-shaped corridor, so all rooms are connected. By default
+    rooms are up to 12 cells wide and as many are tried as would cover
+    the map about twice over."""
+    randint = _scalar(rng).randint
+    plane = bytearray([WALL]) * (rows * cols)
+    max_size = max_size or max(min_size, min(rows, cols, 48) // 4)
+    rooms = rooms or max(1, 2 * rows * cols // (min_size + max_size) ** 2)
+    placed = []
+    for _ in range(tries or rooms * 10):
+        if len(placed) >= rooms:
+            break
+        h = randint(min(min_size, rows), min(max_size, rows))
+        w = randint(min(min_size, cols), min(max_size, cols))
+        r, c = randint(0, rows - h), randint(0, cols - w)
+        # keep a one-cell wall around rooms: nothing free in the margin
+        lo, hi = max(c - 1, 0), min(c + w + 1, cols)
+        if any(plane.find(FREE, row*cols + lo, row*cols + hi) != -1
+               for row in range(max(r - 1, 0), min(r + h + 1, rows))):
+            continue
+        for row in range(r, r + h):
+            plane[row*cols + c:row*cols + c + w] = bytes(w)
+        placed.append((r, c, h, w))
+    # chain the rooms in a serpentine sweep over bands of rows, so each
+    # corridor only runs to a nearby room
+    band = 2 * max_size
+    centres = sorted(((r + h // 2, c + w // 2) for r, c, h, w in placed),
+                     key=lambda rc: (rc[0] // band, rc[1] if rc[0] // band % 2 == 0 else -rc[1]))
+    for (r0, c0), (r1, c1) in zip(centres, centres[1:]):
+        if randint(0, 1):                   # horizontal leg first
+            r0, c0, r1, c1 = r1, c1, r0, c0
+        for row in range(min(r0, r1), max(r0, r1) + 1):
+            plane[row*cols + c0] = FREE
+        lo, hi = min(c0, c1), max(c0, c1)
+        plane[r1*cols + lo:r1*cols + hi + 1] = bytes(hi - lo + 1)
+    return plane
+
+GENERATORS = {
+    "uniform":  uniform,
+    "division": division,
+    "caves":    caves,
+    "rooms":    rooms,
+}
+
+
+# ─────────────────────────────────────────────
+#  CONNECTIVITY
+# ─────────────────────────────────────────────
+def connect(grid):
+    """Carve the fewest walls that join grid.target to grid.start.
+
+    A 0-1 BFS from the target (entering a wall costs 1) stops at the first
+    cell of the start's region; the walls on that route are cleared.
+    Returns the number of cells carved.
+    """
+    cells, moves, border = grid.cells, grid.moves, grid.border
+    s, t = grid.start_id, grid.target_id
+    for i in (s, t):
+        grid.set_cell(i, FREE)
+    if grid.connected():
+        return 0
+    components = grid.components()
+    region = components.root(s)
+    parent = {t: None}
+    dist = {t: 0}
+    queue = deque([t])
+    while queue:
+        i = queue.popleft()
+        if not cells[i] and components.root(i) == region:
+            break
+        for off, _ in moves[border[i]]:
+            j = i + off
+            d = dist[i] + (1 if cells[j] else 0)
+            if d < dist.get(j, grid.size):
+                dist[j] = d
+                parent[j] = i
+                if cells[j]:
+                    queue.append(j)
+                else:
+                    queue.appendleft(j)
+    carved = 0
+    while i is not None:
+        if cells[i]:
+            grid.set_cell(i, FREE)
+            carved += 1
+        i = parent[i]
+    return carved
+
+
+# ─────────────────────────────────────────────
+#  PUBLIC API
+# ─────────────────────────────────────────────
+def generate(kind="uniform", rows=18, cols=20, seed=None, connected=False,
+             start=None, target=None, rng=None, **params):
+    """One Grid from generator ``kind``; ``params`` go to the generator.
+
+    Start / target default to the Grid defaults and are always left free;
+    ``connected`` also carves a route between them when the maze has none.
+    """
+    try:
+        make = GENERATORS[kind]
+    except KeyError:
+        raise ValueError(f"unknown maze kind {kind!r}; "
+                         f"choose from {', '.join(GENERATORS)}") from None
+    if rng is None:
+        rng = make_rng(seed)
+    grid = Grid(rows, cols, cells=make(rows, cols, rng, **params))
+    if start is not None:
+        grid.start = start
+    if target is not None:
+        grid.target = target
+    if connected:
+        connect(grid)
+    else:
+        for i in (grid.start_id, grid.target_id):
+            grid.set_cell(i, FREE)
+    return grid
+
+def generate_many(kind, count, rows, cols, seed=None, **kwargs):
+    """Yield ``count`` Grids; map ``i`` is drawn from its own (seed, i) stream."""
+    for i in range(count):
+        yield generate(kind, rows, cols, rng=make_rng(seed, i), **kwargs)
+
+
+# ─────────────────────────────────────────────
+#  CLI
+# ─────────────────────────────────────────────
+def _parse_param(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    try:
+        return key, int(value)
+    except ValueError:
+        try:
+            return key, float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{key}: {value!r} is not a number") from None
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Generate seeded mazes in bulk.")
+    p.add_argument("kind", choices=list(GENERATORS))
+    p.add_argument("size", type=_parse_size, metavar="ROWSxCOLS")
+    p.add_argument("--count", type=int, default=1)
+    p.add_argument("--seed", type=int)
+    p.add_argument("-p", "--param", type=_parse_param, action="append", default=[],
+                   metavar="KEY=VALUE",
+                   help="generator parameter, e.g. density=0.3, fill=0.5, rooms=12")
+    p.add_argument("--connected", action="store_true",
+                   help="carve a route between start and target when needed")
+    p.add_argument("--out", help="directory to write the maps to (default: print them)")
+    p.add_argument("--format", default="pfb", choices=["pfb", "pfm", "map", "txt"],
+                   help="file format for --out (default pfb, see maps.py)")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    grids = generate_many(args.kind, args.count, *args.size, seed=args.seed,
+                          connected=args.connected, **dict(args.param))
+    if args.out is None:
+        for grid in grids:
+            print(grid.to_text())
+        return 0
+    os.makedirs(args.out, exist_ok=True)
+    for i, grid in enumerate(grids):
+        save_grid(grid, os.path.join(args.out, f"{args.kind}-{i:05d}.{args.format}"))
+    print(f"wrote {args.count} maps to {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
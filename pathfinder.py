@@ -4,12 +4,33 @@ GOOD PERFORMANCE TIME APP
 AI Pathfinder - 6 Uninformed Search Algorithms with Dynamic Obstacles
 """
 
-import pygame
 import sys
 import random
 import time
-from collections import deque
+from collections import OrderedDict, deque
+from collections.abc import MutableSet
+from array import array
+from itertools import accumulate, compress
 import heapq
+import queue
+import threading
+from functools import partial
+import weakref
+import copy
+import json
+import csv
+import re
+import argparse
+
+pygame = None   # imported by _load_pygame() only when the GUI starts
+
+
+def _load_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+        pygame = _pygame
+    return pygame
 
 # ─────────────────────────────────────────────
 #  CONSTANTS
@@ -23,8 +44,12 @@ PANEL_X = GRID_OFFSET_X + GRID_COLS * CELL + 20
 
 FPS = 60
 STEP_DELAY = 0.06          # seconds between algorithm steps
+STEP_BUDGET = 0.008        # max seconds spent stepping per frame
+SPEEDS     = [1, 2, 5, 20, 100, 1000]   # steps per STEP_DELAY
 DYN_PROB   = 0.018          # probability a dynamic obstacle spawns per step
+REPAIR_WATCH = 200         # steps a repaired UCS run keeps spawning obstacles
 DLS_LIMIT  = 8             # depth limit for DLS
+CLUSTER_SIZE = 16          # cluster side for hierarchical search
 
 # Colours
 BG          = (18,  18,  30)
@@ -53,6 +78,10 @@ INFO_C      = (100, 220, 200)
 DIRECTIONS = [(-1,0),(0,1),(1,0),(1,1),(0,-1),(-1,-1),(-1,1),(1,-1)]
 DIR_NAMES  = ["Up","Right","Down","Down-Right","Left","Top-Left","Top-Right","Down-Left"]
 
+# Exact integer step costs (1.0 / 1.4 scaled by COST_SCALE) for engines
+# that compare accumulated costs for equality
+STEP_COST, DIAG_COST, COST_SCALE = 5, 7, 5
+
 ALGORITHMS = ["BFS","DFS","UCS","DLS","IDDFS","Bidirectional"]
 
 ALG_COLORS = {
@@ -67,64 +96,698 @@ ALG_COLORS = {
 # ─────────────────────────────────────────────
 #  GRID
 # ─────────────────────────────────────────────
+# Cell states in Grid.cells
+FREE, WALL, DYN_WALL = 0, 1, 2
+_FREE_MASK = bytes([1]) + bytes(255)     # translate(): 1 where FREE
+_BLOCKED_MASK = bytes([0]) + bytes([1]) * 255   # translate(): 1 unless FREE
+
+
+def _move_tables(cols, straight=1.0, diag=1.4):
+    """Per border-class tuples of (id offset, step cost) in DIRECTIONS order.
+
+    A cell's border class packs first/last row (bits 2, 3) and first/last
+    column (bits 0, 1), so the 16 tables cover every in-bounds neighbour
+    pattern and the per-cell lookup is a single byte.
+    """
+    tables = []
+    for cls in range(16):
+        moves = []
+        for dr, dc in DIRECTIONS:
+            if (dr < 0 and cls & 4) or (dr > 0 and cls & 8):
+                continue
+            if (dc < 0 and cls & 1) or (dc > 0 and cls & 2):
+                continue
+            cost = diag if (dr != 0 and dc != 0) else straight
+            moves.append((dr*cols + dc, cost))
+        tables.append(tuple(moves))
+    return tables
+
+
+def _dir_tables(cols):
+    """Like _move_tables, but tuples of (id offset, direction index)."""
+    return [tuple((dr*cols + dc, k) for k, (dr, dc) in enumerate(DIRECTIONS)
+                  if not ((dr < 0 and cls & 4) or (dr > 0 and cls & 8) or
+                          (dc < 0 and cls & 1) or (dc > 0 and cls & 2)))
+            for cls in range(16)]
+
+
+def _border_classes(rows, cols):
+    row = bytearray(cols)
+    row[0] |= 1
+    row[-1] |= 2
+    first = bytes(b | 4 for b in row)
+    last  = bytes(b | 8 for b in row)
+    if rows == 1:
+        return bytearray(b | 12 for b in row)
+    return bytearray(first + bytes(row) * (rows-2) + last)
+
+
+class CellSet(MutableSet):
+    """Set-of-(r, c) view over the cells of one kind in a Grid."""
+
+    def __init__(self, grid, kind):
+        self.grid = grid
+        self.kind = kind
+
+    def __contains__(self, pos):
+        r, c = pos
+        g = self.grid
+        return 0 <= r < g.rows and 0 <= c < g.cols and g.cells[r*g.cols + c] == self.kind
+
+    def __iter__(self):
+        cells, cols = self.grid.cells, self.grid.cols
+        i = cells.find(self.kind)
+        while i != -1:
+            yield divmod(i, cols)
+            i = cells.find(self.kind, i + 1)
+
+    def __len__(self):
+        return self.grid.cells.count(self.kind)
+
+    def add(self, pos):
+        self.grid.set_cell(self.grid.cell_id(*pos), self.kind)
+
+    def discard(self, pos):
+        if pos in self:
+            self.grid.set_cell(self.grid.cell_id(*pos), FREE)
+
+    def clear(self):
+        g = self.grid
+        for i in list(g.iter_ids(self.kind)):
+            g.set_cell(i, FREE)
+
+    def __repr__(self):
+        return f"CellSet({set(self)!r})"
+
+
+def _ring_groups():
+    """Number of 8-connected groups each subset of a cell's neighbours
+    forms on its own (bit k = DIRECTIONS[k])."""
+    table = bytearray(256)
+    for mask in range(256):
+        left = {k for k in range(8) if mask >> k & 1}
+        while left:
+            table[mask] += 1
+            todo = [left.pop()]
+            while todo:
+                ar, ac = DIRECTIONS[todo.pop()]
+                near = {k for k in left
+                        if max(abs(DIRECTIONS[k][0] - ar), abs(DIRECTIONS[k][1] - ac)) == 1}
+                left -= near
+                todo.extend(near)
+    return table
+
+_RING_GROUPS = _ring_groups()
+_FREE_RUN = re.compile(rb"\x00+")
+
+
+class Components:
+    """Connected components of the free cells (8-connected, like moves).
+
+    Union-find over ``label`` ids. A freed cell gets a new id united with
+    its free neighbours. Blocking a cell can only split its component: if
+    the remaining free neighbours do not link up around the cell on their
+    own, the component is marked dirty and re-flooded the next time a
+    query lands in it. Different roots therefore always mean disconnected,
+    and the same clean root means connected.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.ring = _dir_tables(grid.cols)
+        self._build()
+
+    def _build(self):
+        grid, cols = self.grid, self.grid.cols
+        self.label  = label = array("i", [-1]) * grid.size
+        self.parent = parent = array("i")
+        self.size   = size = array("i")
+        self.dirty  = set()
+        prev = []       # (first col, end col, id) of the previous row's free runs
+        for r in range(grid.rows):
+            base = r * cols
+            row = []
+            for m in _FREE_RUN.finditer(grid.cells, base, base + cols):
+                a, b = m.start() - base, m.end() - base
+                n = len(parent)
+                parent.append(n)
+                size.append(b - a)
+                label[base+a:base+b] = array("i", [n]) * (b - a)
+                row.append((a, b, n))
+            j = 0
+            for a, b, n in row:     # runs touching [a-1, b] above are linked
+                while j < len(prev) and prev[j][1] < a:
+                    j += 1
+                k = j
+                while k < len(prev) and prev[k][0] <= b:
+                    self._union(n, prev[k][2])
+                    k += 1
+            prev = row
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            size = self.size
+            if size[a] < size[b]:
+                a, b = b, a
+            self.parent[b] = a
+            size[a] += size[b]
+            if b in self.dirty:
+                self.dirty.discard(b)
+                self.dirty.add(a)
+        return a
+
+    def update(self, i, old, new):
+        """Grid.set_cell hook."""
+        if (old == FREE) == (new == FREE):
+            return
+        grid, label = self.grid, self.label
+        cells = grid.cells
+        if new == FREE:
+            if len(self.parent) > 2 * grid.size:
+                self._build()       # ids only grow; start over now and then
+                return
+            n = len(self.parent)
+            self.parent.append(n)
+            self.size.append(1)
+            label[i] = n
+            for off, _ in self.ring[grid.border[i]]:
+                if not cells[i+off]:
+                    self._union(n, label[i+off])
+            return
+        root = self.find(label[i])
+        label[i] = -1
+        self.size[root] -= 1
+        mask = 0
+        for off, k in self.ring[grid.border[i]]:
+            if not cells[i+off]:
+                mask |= 1 << k
+        if not self.size[root]:
+            self.dirty.discard(root)
+        elif (_RING_GROUPS[mask] > 1 and not self._linked_nearby(i, mask)
+              and not self._split_pockets(i, mask, root)):
+            self.dirty.add(root)
+
+    def _linked_nearby(self, i, mask, radius=2):
+        """Whether the free neighbours of the just-blocked cell ``i`` still
+        link up inside the (2*radius+1)^2 window around it."""
+        grid, cells, border, ring = self.grid, self.grid.cells, self.grid.border, self.ring
+        r0, c0 = divmod(i, grid.cols)
+        cols = grid.cols
+        near = [i + off for off, k in ring[border[i]] if mask >> k & 1]
+        seen = {near[0]}
+        stack = [near[0]]
+        while stack:
+            u = stack.pop()
+            for off, _ in ring[border[u]]:
+                v = u + off
+                if v not in seen and not cells[v]:
+                    r, c = divmod(v, cols)
+                    if abs(r - r0) <= radius and abs(c - c0) <= radius:
+                        seen.add(v)
+                        stack.append(v)
+        return seen.issuperset(near)
+
+    def _split_pockets(self, i, mask, root, budget=4096):
+        """Flood from each free neighbour of the just-blocked cell ``i`` in
+        lockstep. Floods that meet are merged; one that runs dry is a pocket
+        cut off by ``i`` and gets a fresh id. Returns False if the budget
+        ran out with two or more floods still open."""
+        grid, label, ring = self.grid, self.label, self.ring
+        cells, border = grid.cells, grid.border
+        seeds = [i + off for off, k in ring[border[i]] if mask >> k & 1]
+        owner   = {j: f for f, j in enumerate(seeds)}
+        link    = list(range(len(seeds)))   # merged floods point at the survivor
+        stacks  = [[j] for j in seeds]
+        members = [[j] for j in seeds]
+        active  = set(range(len(seeds)))
+        while len(active) > 1:
+            if len(owner) > budget:
+                return False
+            for f in list(active):
+                if f not in active:
+                    continue
+                stack = stacks[f]
+                if not stack:
+                    active.discard(f)
+                    n = len(self.parent)
+                    self.parent.append(n)
+                    self.size.append(len(members[f]))
+                    self.size[root] -= len(members[f])
+                    for j in members[f]:
+                        label[j] = n
+                    if len(active) == 1:
+                        break
+                    continue
+                u = stack.pop()
+                for off, _ in ring[border[u]]:
+                    v = u + off
+                    if cells[v]:
+                        continue
+                    g = owner.get(v)
+                    if g is None:
+                        owner[v] = f
+                        stack.append(v)
+                        members[f].append(v)
+                        continue
+                    while link[g] != g:
+                        g = link[g]
+                    if g != f:
+                        link[g] = f
+                        stack.extend(stacks[g])
+                        members[f].extend(members[g])
+                        stacks[g] = members[g] = None
+                        active.discard(g)
+        return True
+
+    def _reflood(self, i):
+        """Give the true component of free cell ``i`` a fresh, clean id."""
+        grid, label = self.grid, self.label
+        cells, border, ring = grid.cells, grid.border, self.ring
+        old = self.find(label[i])
+        n = len(self.parent)
+        self.parent.append(n)
+        label[i] = n
+        stack = [i]
+        count = 0
+        while stack:
+            u = stack.pop()
+            count += 1
+            for off, _ in ring[border[u]]:
+                v = u + off
+                if not cells[v] and label[v] != n:
+                    label[v] = n
+                    stack.append(v)
+        self.size.append(count)
+        self.size[old] -= count
+        if not self.size[old]:
+            self.dirty.discard(old)
+        return n
+
+    def root(self, i):
+        """Clean component id of cell id ``i``, or -1 if it is blocked."""
+        if self.grid.cells[i]:
+            return -1
+        r = self.find(self.label[i])
+        if r in self.dirty:
+            r = self._reflood(i)
+        return r
+
+    def connected(self, a, b):
+        cells = self.grid.cells
+        if cells[a] or cells[b]:
+            return False
+        ra = self.find(self.label[a])
+        if ra != self.find(self.label[b]):
+            return False
+        return ra not in self.dirty or self.root(a) == self.find(self.label[b])
+
+    def component_size(self, i):
+        r = self.root(i)
+        return self.size[r] if r >= 0 else 0
+
+
 class Grid:
-    def __init__(self, rows, cols):
+    """Occupancy grid stored as one byte per cell, indexed by r*cols + c.
+
+    Searches work on integer cell ids and the precomputed move tables;
+    (r, c) tuples only appear at the API boundary (start/target, paths,
+    ``walls`` / ``dyn_walls`` views and ``neighbors``). ``cells`` may be
+    any byte plane of that size with the bytearray methods used here, such
+    as the mmap-backed planes of maps.open_native.
+    """
+
+    def __init__(self, rows, cols, rng=None, cells=None):
         self.rows = rows
         self.cols = cols
-        self.walls = set()
-        self.dyn_walls = set()
-        self.start  = (rows-2, 1)
-        self.target = (1, cols-2)
+        self.rng  = rng or random   # random.Random for reproducible spawns
+        self.size = rows * cols
+        self.cells  = bytearray(self.size) if cells is None else cells
+        self._border = None       # border classes, built on first use
+        self.moves  = _move_tables(cols)
+        self.imoves = _move_tables(cols, STEP_COST, DIAG_COST)
+        self.last_spawn = None
+        self.version    = 0       # bumped on every occupancy change
+        self._observers = []
+        self._free     = None     # free-cell index, built on first use
+        self._free_pos = None
+        self._components = None   # connectivity index, built on first use
+        self._cluster_graphs = {} # size -> ClusterGraph, built on first use
+        # one cell in from opposite corners, clamped on 1-row / 1-col grids
+        self.start  = (max(rows-2, 0), min(1, cols-1))
+        self.target = (min(1, rows-1), max(cols-2, 0))
+
+    @property
+    def border(self):
+        """Border class per cell id (see _move_tables). Built on first use,
+        so opening a mapped plane touches none of its pages."""
+        if self._border is None:
+            self._border = _border_classes(self.rows, self.cols)
+        return self._border
+
+    # ── id <-> (r, c) ─────────────────────────
+    def cell_id(self, r, c):
+        return r * self.cols + c
+
+    def cell(self, i):
+        return divmod(i, self.cols)
+
+    def to_cells(self, ids):
+        cols = self.cols
+        return [divmod(i, cols) for i in ids]
+
+    @property
+    def start_id(self):
+        return self.cell_id(*self.start)
+
+    @property
+    def target_id(self):
+        return self.cell_id(*self.target)
+
+    # ── occupancy ─────────────────────────────
+    @property
+    def walls(self):
+        return CellSet(self, WALL)
+
+    @walls.setter
+    def walls(self, cells):
+        self._assign(WALL, cells)
+
+    @property
+    def dyn_walls(self):
+        return CellSet(self, DYN_WALL)
+
+    @dyn_walls.setter
+    def dyn_walls(self, cells):
+        self._assign(DYN_WALL, cells)
+
+    def _assign(self, kind, cells):
+        cells = list(cells)
+        CellSet(self, kind).clear()
+        for r, c in cells:
+            self.set_cell(self.cell_id(r, c), kind)
+
+    def set_cell(self, i, kind):
+        """Single write path for every occupancy change."""
+        old = self.cells[i]
+        if old != kind:
+            self.cells[i] = kind
+            self.version += 1
+            if self._free is not None:
+                if old == FREE:
+                    self._free_remove(i)
+                elif kind == FREE:
+                    self._free_pos[i] = len(self._free)
+                    self._free.append(i)
+            if self._components is not None:
+                self._components.update(i, old, kind)
+            for fn in self._observers:
+                fn(i, old, kind)
+
+    def add_observer(self, fn):
+        """Call ``fn(cell_id, old_kind, new_kind)`` after every change."""
+        self._observers.append(fn)
+
+    def remove_observer(self, fn):
+        if fn in self._observers:
+            self._observers.remove(fn)
+
+    # ── free-cell index ───────────────────────
+    # Swap-remove array of free ids plus id -> slot map, kept in sync by
+    # set_cell, so picking / testing / removing a free cell is O(1).
+    # Slots are only meaningful for free cells.
+    def _build_free_index(self):
+        is_free = self.cells.translate(_FREE_MASK)
+        self._free = array("i", compress(range(self.size), is_free))
+        # running count of free cells up to and including i, minus one
+        self._free_pos = array("i", accumulate(is_free, initial=-1))[1:]
+
+    def _free_remove(self, i):
+        free, pos = self._free, self._free_pos
+        slot, last = pos[i], free[-1]
+        free[slot] = last
+        pos[last] = slot
+        free.pop()
+
+    def free_count(self):
+        if self._free is None:
+            self._build_free_index()
+        return len(self._free)
+
+    def random_free_cell(self, rng=None):
+        """Uniform random free id other than start/target, or None."""
+        if self._free is None:
+            self._build_free_index()
+        free = self._free
+        skip = {self.start_id, self.target_id}
+        spare = len(free) - sum(1 for i in skip if not self.cells[i])
+        if spare <= 0:
+            return None
+        choice = (rng or self.rng).choice
+        while True:
+            i = choice(free)
+            if i not in skip:
+                return i
+
+    # ── connectivity ──────────────────────────
+    def components(self):
+        if self._components is None:
+            self._components = Components(self)
+        return self._components
+
+    def cluster_graph(self, size=CLUSTER_SIZE):
+        """ClusterGraph for hierarchical search, kept like components(): it
+        observes the grid, so its caches carry over between queries."""
+        graph = self._cluster_graphs.get(size)
+        if graph is None:
+            graph = self._cluster_graphs[size] = ClusterGraph(self, size)
+        return graph
+
+    def with_endpoints(self, start, target):
+        """Shallow copy with its own start / target for a read-only search.
+
+        It shares this grid's cells and indexes, which are built first so
+        the copy never builds (and then drops) its own; wall changes must
+        go to this grid, and not while the copy is in use.
+        """
+        # warm the lazy indexes so the copy shares them instead of building its own
+        self.border
+        self.components()
+        view = copy.copy(self)
+        view.start, view.target = start, target
+        return view
+
+    def _drop_cluster_graphs(self):
+        for graph in self._cluster_graphs.values():
+            graph.close()
+        self._cluster_graphs.clear()
+
+    def connected(self, a=None, b=None):
+        """Whether cells ``a`` and ``b`` (default start, target) are linked."""
+        a, b = a or self.start, b or self.target
+        return self.components().connected(self.cell_id(*a), self.cell_id(*b))
+
+    def component_size(self, cell=None):
+        """Free cells reachable from ``cell`` (default start), itself included."""
+        return self.components().component_size(self.cell_id(*(cell or self.start)))
+
+    def is_free(self, r, c):
+        return self.in_bounds(r, c) and not self.cells[r*self.cols + c]
+
+    def iter_ids(self, kind):
+        cells = self.cells
+        i = cells.find(kind)
+        while i != -1:
+            yield i
+            i = cells.find(kind, i + 1)
 
     def reset_walls(self):
+        self._components = None     # cheaper to rebuild than to patch
+        self._drop_cluster_graphs()
         self.walls.clear()
         self.dyn_walls.clear()
 
-    def random_walls(self, density=0.22):
+    def random_walls(self, density=0.22, rng=None):
+        """Fill walls at ``density``; pass a random.Random for reproducible maps."""
+        rand = (rng or self.rng).random
+        self._components = None
+        self._drop_cluster_graphs()
         self.walls.clear()
         self.dyn_walls.clear()
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if (r,c) in (self.start, self.target):
-                    continue
-                if random.random() < density:
-                    self.walls.add((r,c))
+        skip = (self.start_id, self.target_id)
+        for i in range(self.size):
+            if i in skip:
+                continue
+            if rand() < density:
+                self.set_cell(i, WALL)
 
     def is_blocked(self, r, c):
-        return (r,c) in self.walls or (r,c) in self.dyn_walls
+        return self.in_bounds(r, c) and self.cells[r*self.cols + c] != FREE
 
     def in_bounds(self, r, c):
         return 0 <= r < self.rows and 0 <= c < self.cols
 
+    def neighbor_ids(self, i):
+        """[(id, cost)] of free cells around cell id ``i``."""
+        cells = self.cells
+        return [(i+off, cost) for off, cost in self.moves[self.border[i]]
+                if not cells[i+off]]
+
     def neighbors(self, r, c):
-        result = []
-        for dr, dc in DIRECTIONS:
-            nr, nc = r+dr, c+dc
-            if self.in_bounds(nr, nc) and not self.is_blocked(nr, nc):
-                cost = 1.4 if (dr != 0 and dc != 0) else 1.0
-                result.append((nr, nc, cost))
-        return result
+        cols = self.cols
+        return [(*divmod(j, cols), cost)
+                for j, cost in self.neighbor_ids(r*cols + c)]
+
+    # ── text maps ─────────────────────────────
+    @classmethod
+    def from_text(cls, text):
+        """Build a grid from rows of '.' (free), '#' (wall), 'S', 'T'."""
+        lines = [ln.rstrip() for ln in text.splitlines() if ln.strip()]
+        if not lines:
+            raise ValueError("empty map")
+        cols = max(len(ln) for ln in lines)
+        grid = cls(len(lines), cols)
+        for r, line in enumerate(lines):
+            for c, ch in enumerate(line.ljust(cols, ".")):
+                if ch == "#":
+                    grid.set_cell(r*cols + c, WALL)
+                elif ch == "S":
+                    grid.start = (r, c)
+                elif ch == "T":
+                    grid.target = (r, c)
+                elif ch != ".":
+                    raise ValueError(f"bad map character {ch!r} at row {r}, col {c}")
+        return grid
+
+    def to_text(self):
+        chars = {FREE: ".", WALL: "#", DYN_WALL: "#"}
+        rows = []
+        for r in range(self.rows):
+            row = [chars[b] for b in self.cells[r*self.cols:(r+1)*self.cols]]
+            if r == self.start[0]:
+                row[self.start[1]] = "S"
+            if r == self.target[0]:
+                row[self.target[1]] = "T"
+            rows.append("".join(row))
+        return "\n".join(rows) + "\n"
 
     def spawn_dynamic(self, current_path=None):
         """Spawn a dynamic obstacle; returns True if path is blocked."""
-        candidates = []
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if (r,c) not in self.walls and (r,c) not in self.dyn_walls:
-                    if (r,c) != self.start and (r,c) != self.target:
-                        candidates.append((r,c))
-        if not candidates:
+        i = self.random_free_cell()
+        if i is None:
             return False
-        pos = random.choice(candidates)
-        self.dyn_walls.add(pos)
-        if current_path and pos in current_path:
+        self.set_cell(i, DYN_WALL)
+        self.last_spawn = i
+        if current_path and self.cell(i) in current_path:
             return True
         return False
 
+    def spawn_dynamic_many(self, k, rng=None):
+        """Spawn up to ``k`` dynamic obstacles; returns their ids."""
+        spawned = []
+        for _ in range(k):
+            i = self.random_free_cell(rng)
+            if i is None:
+                break
+            self.set_cell(i, DYN_WALL)
+            spawned.append(i)
+        if spawned:
+            self.last_spawn = spawned[-1]
+        return spawned
+
+
+def load_map(path):
+    """Text map, or a MovingAI .map / native .pfm / packed .pfb map (see maps.py)."""
+    if path.lower().endswith((".map", ".pfm", ".pfb")):
+        from maps import load_grid      # maps imports this module
+        return load_grid(path)
+    with open(path) as f:
+        return Grid.from_text(f.read())
+
+
+# ─────────────────────────────────────────────
+#  SEARCH STEPS
+# ─────────────────────────────────────────────
+class Step:
+    """One expansion of a search generator, expressed as a delta.
+
+    Generators never hand out their internal sets; each yield carries only
+    the cell ids that left / joined the frontier (``removed`` is applied
+    before ``added``), the ids that became explored, and the (r, c) path
+    once one is found. ``reset`` marks the start of
+    a fresh iteration (IDDFS) where the consumer must drop its state first.
+    """
+    __slots__ = ("added", "removed", "explored", "path", "reset")
+
+    def __init__(self, added=(), removed=(), explored=(), path=(), reset=False):
+        self.added    = added
+        self.removed  = removed
+        self.explored = explored
+        self.path     = path
+        self.reset    = reset
+
+
+class SearchState:
+    """Consumer-side frontier/explored id sets rebuilt from Step deltas."""
+
+    def __init__(self, grid):
+        self.grid     = grid
+        self.frontier = set()
+        self.explored = set()
+        self.path     = []
+        self.path_ids = set()
+
+    def clear(self):
+        self.frontier.clear()
+        self.explored.clear()
+        self.set_path([])
+
+    def set_path(self, path):
+        cols = self.grid.cols
+        self.path     = list(path)
+        self.path_ids = {r*cols + c for r, c in self.path}
+
+    def apply(self, step):
+        if step.reset:
+            self.frontier.clear()
+            self.explored.clear()
+        self.frontier.difference_update(step.removed)
+        self.frontier.update(step.added)
+        self.explored.update(step.explored)
+        if step.path:
+            self.set_path(step.path)
+        return step
+
+    def snapshot(self):
+        """Full (frontier, explored, path) of (r, c) cells - built on request."""
+        cols = self.grid.cols
+        return ({divmod(i, cols) for i in self.frontier},
+                {divmod(i, cols) for i in self.explored},
+                list(self.path))
+
+
+def snapshots(gen, grid):
+    """Adapt a delta generator to the old (frontier, explored, path) tuples."""
+    state = SearchState(grid)
+    for step in gen:
+        state.apply(step)
+        frontier, explored, _ = state.snapshot()
+        yield frontier, explored, list(step.path)
+
 
 # ─────────────────────────────────────────────
 #  SEARCH ALGORITHMS
 # ─────────────────────────────────────────────
+# All generators run on integer cell ids (see Grid); Step deltas carry ids
+# and only the final path is converted back to (r, c) tuples.
+
 def reconstruct(came_from, start, target):
     path = []
     cur = target
@@ -138,146 +801,259 @@ def reconstruct(came_from, start, target):
     return path
 
 def bfs_gen(grid):
-    """Yields (frontier_set, explored_set, path) step by step."""
-    start, target = grid.start, grid.target
+    """Yields one Step delta per expansion."""
+    cells, moves, border = grid.cells, grid.moves, grid.border
+    start, target = grid.start_id, grid.target_id
     queue = deque([start])
     came_from = {start: None}
-    explored = set()
-    frontier = {start}
 
     while queue:
         node = queue.popleft()
-        frontier.discard(node)
         if node == target:
-            path = reconstruct(came_from, start, target)
-            yield frontier.copy(), explored.copy(), path
+            path = grid.to_cells(reconstruct(came_from, start, target))
+            yield Step(removed=(node,), path=path)
             return
-        explored.add(node)
-        for nr, nc, _ in grid.neighbors(*node):
-            nxt = (nr, nc)
-            if nxt not in came_from:
+        added = []
+        for off, _ in moves[border[node]]:
+            nxt = node + off
+            if not cells[nxt] and nxt not in came_from:
                 came_from[nxt] = node
                 queue.append(nxt)
-                frontier.add(nxt)
-        yield frontier.copy(), explored.copy(), []
-    yield frontier.copy(), explored.copy(), []
+                added.append(nxt)
+        yield Step(added, (node,), (node,))
+    yield Step()
 
 def dfs_gen(grid):
-    start, target = grid.start, grid.target
+    cells, moves, border = grid.cells, grid.moves, grid.border
+    start, target = grid.start_id, grid.target_id
     stack = [start]
     came_from = {start: None}
     explored = set()
-    frontier = {start}
 
     while stack:
         node = stack.pop()
-        frontier.discard(node)
         if node in explored:
-            yield frontier.copy(), explored.copy(), []
+            yield Step(removed=(node,))
             continue
         if node == target:
-            path = reconstruct(came_from, start, target)
-            yield frontier.copy(), explored.copy(), path
+            path = grid.to_cells(reconstruct(came_from, start, target))
+            yield Step(removed=(node,), path=path)
             return
         explored.add(node)
-        for nr, nc, _ in grid.neighbors(*node):
-            nxt = (nr, nc)
-            if nxt not in explored:
+        added = []
+        for off, _ in moves[border[node]]:
+            nxt = node + off
+            if not cells[nxt] and nxt not in explored:
                 came_from[nxt] = node
                 stack.append(nxt)
-                frontier.add(nxt)
-        yield frontier.copy(), explored.copy(), []
-    yield frontier.copy(), explored.copy(), []
+                added.append(nxt)
+        yield Step(added, (node,), (node,))
+    yield Step()
+
+class HeapQueue:
+    """Binary-heap priority queue for ucs_gen.
+
+    ``push`` inserts an item or lowers its key; superseded heap entries
+    stay behind and are skipped by ``pop`` (lazy deletion).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._key  = {}       # live item -> key
+
+    def __len__(self):
+        return len(self._key)
+
+    def push(self, item, key):
+        if key < self._key.get(item, key + 1):
+            self._key[item] = key
+            heapq.heappush(self._heap, (key, item))
 
-def ucs_gen(grid):
-    start, target = grid.start, grid.target
-    pq = [(0, start)]
+    def pop(self):
+        """Remove and return (key, item) with the smallest key."""
+        heap, live = self._heap, self._key
+        while True:
+            key, item = heapq.heappop(heap)
+            if live.get(item) == key:
+                del live[item]
+                return key, item
+
+
+class BucketQueue:
+    """Dial's circular bucket queue for small integer keys.
+
+    Keys must never be below the last popped key nor more than
+    ``max_step`` above it (true for UCS on the 5/7 costs), so
+    ``max_step + 1`` buckets indexed by key modulo their count suffice.
+    Push and decrease-key move the item between buckets, so nothing is
+    ever stored twice; pop scans at most ``max_step`` empty buckets.
+    """
+
+    def __init__(self, max_step=DIAG_COST):
+        self._n = max_step + 1
+        self._buckets = [{} for _ in range(self._n)]
+        self._key = {}        # item -> key
+        self._cur = 0
+
+    def __len__(self):
+        return len(self._key)
+
+    def push(self, item, key):
+        keys = self._key
+        old = keys.get(item)
+        if old is not None:
+            if key >= old:
+                return
+            del self._buckets[old % self._n][item]
+        keys[item] = key
+        self._buckets[key % self._n][item] = None
+
+    def pop(self):
+        """Remove and return (key, item) with the smallest key."""
+        if not self._key:
+            raise IndexError("pop from an empty BucketQueue")
+        buckets, n, cur = self._buckets, self._n, self._cur
+        while not buckets[cur % n]:
+            cur += 1
+        self._cur = cur
+        item, _ = buckets[cur % n].popitem()
+        del self._key[item]
+        return cur, item
+
+
+def ucs_gen(grid, queue=None):
+    """Uniform-cost search on the integer costs of Grid.imoves.
+
+    ``queue`` is the priority-queue class (``push(item, key)`` inserting or
+    decreasing a key, ``pop()`` returning (key, item)): HeapQueue by
+    default, BucketQueue for O(1) operations.
+    """
+    cells, imoves, border = grid.cells, grid.imoves, grid.border
+    start, target = grid.start_id, grid.target_id
+    pq = (queue or HeapQueue)()
+    push, pop = pq.push, pq.pop
+    push(start, 0)
     came_from = {start: None}
     cost_so_far = {start: 0}
-    explored = set()
-    frontier = {start}
 
     while pq:
-        cost, node = heapq.heappop(pq)
-        frontier.discard(node)
+        cost, node = pop()
         if node == target:
-            path = reconstruct(came_from, start, target)
-            yield frontier.copy(), explored.copy(), path
+            path = grid.to_cells(reconstruct(came_from, start, target))
+            yield Step(removed=(node,), path=path)
             return
-        if node in explored:
-            yield frontier.copy(), explored.copy(), []
-            continue
-        explored.add(node)
-        for nr, nc, move_cost in grid.neighbors(*node):
-            nxt = (nr, nc)
+        added = []
+        for off, move_cost in imoves[border[node]]:
+            nxt = node + off
+            if cells[nxt]:
+                continue
             new_cost = cost + move_cost
             if nxt not in cost_so_far or new_cost < cost_so_far[nxt]:
                 cost_so_far[nxt] = new_cost
                 came_from[nxt] = node
-                heapq.heappush(pq, (new_cost, nxt))
-                frontier.add(nxt)
-        yield frontier.copy(), explored.copy(), []
-    yield frontier.copy(), explored.copy(), []
+                push(nxt, new_cost)
+                added.append(nxt)
+        yield Step(added, (node,), (node,))
+    yield Step()
+
+# Depth-bounded DFS engine shared by DLS and IDDFS. Parents and best depths
+# live in two int arrays indexed by cell id (allocated once per search and
+# reset only where touched), so a push is O(1) and the path is rebuilt
+# from parent pointers only when the target is popped.
+UNSEEN = 2**31 - 1
+
+def _depth_limited(grid, limit, depth, parent, reset=False):
+    """Yields Steps; returns (found, cutoff).
+
+    A cell is (re-)pushed only when reached at a smaller depth than before,
+    so nothing is expanded twice at the same or a worse depth within one
+    call. ``cutoff`` tells whether the limit actually pruned a move - if
+    not, deeper iterations cannot find anything new. Best depths are
+    cleared on return: each IDDFS iteration starts from scratch.
+    """
+    # A node cut at the limit may later be reached shallower and expanded
+    # after all, so cut nodes are only judged once the stack is empty.
+    cells, moves, border = grid.cells, grid.moves, grid.border
+    start, target = grid.start_id, grid.target_id
+    touched = [start]
+    depth[start] = 0
+    parent[start] = -1
+    stack = [(start, 0)]
+    cut = []
+    try:
+        while stack:
+            node, d = stack.pop()
+            if d != depth[node]:
+                # re-reached at a shallower depth after this push
+                yield Step(removed=(node,), reset=reset)
+                reset = False
+                continue
+            if node == target:
+                path = []
+                while node != -1:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+                yield Step(removed=(target,), path=grid.to_cells(path), reset=reset)
+                return True, True
+            added = []
+            nd = d + 1
+            for off, _ in moves[border[node]]:
+                nxt = node + off
+                if cells[nxt] or depth[nxt] <= nd:
+                    continue
+                if d >= limit:
+                    cut.append(node)
+                    break
+                if depth[nxt] == UNSEEN:
+                    touched.append(nxt)
+                depth[nxt] = nd
+                parent[nxt] = node
+                stack.append((nxt, nd))
+                added.append(nxt)
+            yield Step(added, (node,), (node,), reset=reset)
+            reset = False
+        cutoff = any(depth[node] == limit and
+                     any(not cells[node+off] and depth[node+off] == UNSEEN
+                         for off, _ in moves[border[node]])
+                     for node in cut)
+        return False, cutoff
+    finally:
+        for i in touched:
+            depth[i] = UNSEEN
+
+def _depth_arrays(grid):
+    return array("i", [UNSEEN]) * grid.size, array("i", [-1]) * grid.size
 
 def dls_gen(grid, limit=DLS_LIMIT):
-    start, target = grid.start, grid.target
-    # Iterative stack: (node, depth, path_so_far)
-    stack = [(start, 0, [start])]
-    explored = set()
-    frontier = {start}
-
-    while stack:
-        node, depth, path = stack.pop()
-        frontier.discard(node)
-        if node == target:
-            yield frontier.copy(), explored.copy(), path
-            return
-        explored.add(node)
-        if depth < limit:
-            for nr, nc, _ in grid.neighbors(*node):
-                nxt = (nr, nc)
-                if nxt not in explored:
-                    stack.append((nxt, depth+1, path+[nxt]))
-                    frontier.add(nxt)
-        yield frontier.copy(), explored.copy(), []
-    yield frontier.copy(), explored.copy(), []
+    depth, parent = _depth_arrays(grid)
+    found, _ = yield from _depth_limited(grid, limit, depth, parent)
+    if not found:
+        yield Step()
 
 def iddfs_gen(grid):
-    start, target = grid.start, grid.target
-    max_depth = grid.rows * grid.cols
+    # Iterations deliberately re-search from the start instead of resuming
+    # from the previous frontier - that would turn IDDFS into a layered
+    # BFS. Only the depth pruning inside each iteration is shared work.
+    depth, parent = _depth_arrays(grid)
+    max_depth = max(grid.component_size(), 1)    # no simple path is longer
 
     for limit in range(1, max_depth + 1):
-        stack = [(start, 0, [start])]
-        explored = set()
-        frontier = {start}
-        found = False
-
-        while stack:
-            node, depth, path = stack.pop()
-            frontier.discard(node)
-            if node == target:
-                yield frontier.copy(), explored.copy(), path
-                return
-            explored.add(node)
-            if depth < limit:
-                for nr, nc, _ in grid.neighbors(*node):
-                    nxt = (nr, nc)
-                    if nxt not in explored:
-                        stack.append((nxt, depth+1, path+[nxt]))
-                        frontier.add(nxt)
-            yield frontier.copy(), explored.copy(), []
-    yield set(), set(), []
+        found, cutoff = yield from _depth_limited(grid, limit, depth, parent,
+                                                  reset=True)
+        if found:
+            return
+        if not cutoff:
+            break           # the whole reachable region fits under limit
+    yield Step(reset=True)
 
 def bidirectional_gen(grid):
-    start, target = grid.start, grid.target
+    cells, moves, border = grid.cells, grid.moves, grid.border
+    start, target = grid.start_id, grid.target_id
     fwd_queue  = deque([start])
     bwd_queue  = deque([target])
     fwd_came   = {start: None}
     bwd_came   = {target: None}
-    fwd_vis    = {start}
-    bwd_vis    = {target}
-    frontier   = {start, target}
-    explored   = set()
 
     def build_path(meet):
         # forward half
@@ -293,45 +1069,1897 @@ def bidirectional_gen(grid):
         while cur is not None:
             path_b.append(cur)
             cur = bwd_came.get(cur)
-        return path_f + path_b
+        return grid.to_cells(path_f + path_b)
 
     while fwd_queue or bwd_queue:
+        added, removed = [], []
         # Forward step
         if fwd_queue:
             node = fwd_queue.popleft()
-            frontier.discard(node)
-            explored.add(node)
-            if node in bwd_vis:
+            removed.append(node)
+            if node in bwd_came:
                 path = build_path(node)
-                yield frontier.copy(), explored.copy(), path
+                yield Step(added, removed, removed, path)
                 return
-            for nr, nc, _ in grid.neighbors(*node):
-                nxt = (nr, nc)
-                if nxt not in fwd_vis:
-                    fwd_vis.add(nxt)
+            for off, _ in moves[border[node]]:
+                nxt = node + off
+                if not cells[nxt] and nxt not in fwd_came:
                     fwd_came[nxt] = node
                     fwd_queue.append(nxt)
-                    frontier.add(nxt)
+                    added.append(nxt)
 
         # Backward step
         if bwd_queue:
             node = bwd_queue.popleft()
-            frontier.discard(node)
-            explored.add(node)
-            if node in fwd_vis:
+            removed.append(node)
+            if node in added:
+                added.remove(node)
+            if node in fwd_came:
                 path = build_path(node)
-                yield frontier.copy(), explored.copy(), path
+                yield Step(added, removed, removed, path)
                 return
-            for nr, nc, _ in grid.neighbors(*node):
-                nxt = (nr, nc)
-                if nxt not in bwd_vis:
-                    bwd_vis.add(nxt)
+            for off, _ in moves[border[node]]:
+                nxt = node + off
+                if not cells[nxt] and nxt not in bwd_came:
                     bwd_came[nxt] = node
                     bwd_queue.append(nxt)
-                    frontier.add(nxt)
+                    added.append(nxt)
+
+        yield Step(added, removed, removed)
+    yield Step(reset=True)
+
+def bidirectional_ucs_gen(grid):
+    """Cost-optimal bidirectional UCS on the integer costs of Grid.imoves.
+
+    Each step expands the side with fewer open cells (the cheaper top on a
+    tie). ``best`` is the cheapest start-target connection seen so far where
+    the two searches touch. A cheaper path would have to join a forward
+    and a backward open cell by at least one move, so once
+    top_f + top_b + STEP_COST >= best the path through it is returned.
+    """
+    cells, imoves, border = grid.cells, grid.imoves, grid.border
+    start, target = grid.start_id, grid.target_id
+    dist   = ({start: 0}, {target: 0})
+    came   = ({start: None}, {target: None})
+    heaps  = ([(0, start)], [(0, target)])
+    closed = (set(), set())
+    best, meet = (0, (start, start)) if start == target else (UNSEEN, None)
+
+    def build_path(f, b):
+        path = reconstruct(came[0], start, f)
+        cur = b if b != f else came[1][b]
+        while cur is not None:
+            path.append(cur)
+            cur = came[1][cur]
+        return grid.to_cells(path)
+
+    while True:
+        for side in (0, 1):
+            heap, d = heaps[side], dist[side]
+            while heap and (heap[0][1] in closed[side] or heap[0][0] > d[heap[0][1]]):
+                heapq.heappop(heap)         # stale entry
+        if not heaps[0] or not heaps[1] or heaps[0][0][0] + heaps[1][0][0] + STEP_COST >= best:
+            break
+        side = 0 if ((len(dist[0]) - len(closed[0]), heaps[0][0][0]) <=
+                     (len(dist[1]) - len(closed[1]), heaps[1][0][0])) else 1
+        cost, node = heapq.heappop(heaps[side])
+        closed[side].add(node)
+        d, parent, other = dist[side], came[side], dist[1 - side]
+        added = []
+        for off, move_cost in imoves[border[node]]:
+            nxt = node + off
+            if cells[nxt]:
+                continue
+            new_cost = cost + move_cost
+            if new_cost < d.get(nxt, UNSEEN):
+                d[nxt] = new_cost
+                parent[nxt] = node
+                heapq.heappush(heaps[side], (new_cost, nxt))
+                added.append(nxt)
+            if nxt in other and new_cost + other[nxt] < best:
+                best = new_cost + other[nxt]
+                meet = (node, nxt) if side == 0 else (nxt, node)
+        yield Step(added, (node,), (node,))
+    if meet is not None:
+        yield Step(path=build_path(*meet))
+        return
+    yield Step()
+
+# Jump-point pruning (JPS) under uniform-cost order. Any move may cut a
+# wall's corner here, so a neighbour is "forced" only when the cell beside
+# the move is blocked. With 5 / 7 costs a diagonal is cheaper than two
+# straight moves and dearer than one, so every pruned neighbour has a path
+# through the parent that is no longer.
+def _padded_blocked(grid):
+    """(plane, width): 1 for blocked cells, on a one-cell blocked border,
+    so no neighbour test needs a bounds check."""
+    rows, cols = grid.rows, grid.cols
+    W = cols + 2
+    blocked = bytes(grid.cells).translate(_BLOCKED_MASK)
+    plane = bytearray(b"\x01" * (W + 1))
+    for r in range(rows):
+        plane += blocked[r*cols:(r+1)*cols]
+        plane += b"\x01\x01"
+    plane += b"\x01" * (W - 1)
+    return bytes(plane), W
+
+def _stop_plane(blk, step, side, target):
+    """1 where a straight scan along ``step`` stops: blocked cells, cells
+    with a forced neighbour across ``side``, and the target. Planes are 0/1
+    bytes, so AND / OR / AND-NOT run on them as whole integers."""
+    n = len(blk)
+    def at(k):      # at(k)[j] == blk[j + k], 0 off the ends
+        return int.from_bytes(blk[k:] + bytes(k) if k > 0 else bytes(-k) + blk[:n + k], "little")
+    stop = int.from_bytes(blk, "little")
+    for s in (side, -side):
+        stop |= at(s) & ~at(s + step)
+    plane = bytearray(stop.to_bytes(n, "little"))
+    plane[target] = 1
+    return bytes(plane)
+
+def jump_ucs_gen(grid):
+    """Cost-optimal UCS that expands only jump points.
+
+    From each expanded cell only the natural and forced directions are
+    followed, and each is followed in a straight line until a cell with a
+    forced neighbour (or the target) turns up; only those jump points
+    enter the frontier. Straight runs are one ``find`` over a precomputed
+    stop plane (column-major for vertical runs); diagonal runs step cell
+    by cell on the padded blocked plane. Steps carry jump points, the
+    final path every cell.
+    """
+    blk, W = _padded_blocked(grid)
+    cols = grid.cols
+    H = grid.rows + 2
+    pad = lambda i: i + (i // cols) * 2 + W + 1
+    unpad = lambda p: (p // W - 1) * cols + p % W - 1
+    start, target = pad(grid.start_id), pad(grid.target_id)
+    east, west = (_stop_plane(blk, s, W, target) for s in (1, -1))
+    south, north = (_stop_plane(blk, s, 1, target) for s in (W, -W))
+    south, north = (b"".join(p[c::W] for c in range(W)) for p in (south, north))
+
+    def line(i, step):
+        """Jump point along straight ``step`` from ``i``, or -1."""
+        if step == 1:
+            j = east.find(1, i + 1)
+        elif step == -1:
+            j = west.rfind(1, 0, i)
+        else:
+            r, c = divmod(i, W)
+            k = (south.find(1, c*H + r + 1) if step > 0 else
+                 north.rfind(1, 0, c*H + r))
+            c, r = divmod(k, H)
+            j = r*W + c
+        return -1 if blk[j] else j
+
+    def diagonal(i, vs, hs):
+        """Jump point along vertical ``vs`` plus horizontal ``hs``, or -1."""
+        step = vs + hs
+        while not blk[i + step]:
+            i += step
+            if (i == target or (blk[i - vs] and not blk[i - vs + hs]) or
+                    (blk[i - hs] and not blk[i - hs + vs])):
+                return i
+            if line(i, hs) >= 0 or line(i, vs) >= 0:
+                return i
+        return -1
+
+    # heading -> [(probe, heading out)]: natural moves have probe 0, forced
+    # ones the offset of the cell whose wall forces them.
+    moves = {None: [(0, (dr * W, dc)) for dr, dc in DIRECTIONS]}
+    for dr, dc in DIRECTIONS:
+        vs, hs = dr * W, dc
+        if vs and hs:
+            out = [(0, (vs, hs)), (0, (vs, 0)), (0, (0, hs)),
+                   (-vs, (-vs, hs)), (-hs, (vs, -hs))]
+        elif vs:
+            out = [(0, (vs, 0)), (1, (vs, 1)), (-1, (vs, -1))]
+        else:
+            out = [(0, (0, hs)), (W, (W, hs)), (-W, (-W, hs))]
+        moves[(vs, hs)] = out
+
+    def build_path():
+        points = reconstruct(came_from, start, target)
+        path = [start]
+        for b in points[1:]:
+            off = sum(heading[b])
+            while path[-1] != b:
+                path.append(path[-1] + off)
+        return grid.to_cells([unpad(p) for p in path])
+
+    pq = HeapQueue()
+    push, pop = pq.push, pq.pop
+    push(start, 0)
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+    best = cost_so_far.get
+    heading = {start: None}
+
+    while pq:
+        cost, node = pop()
+        if node == target:
+            yield Step(removed=(unpad(node),), path=build_path())
+            return
+        added = []
+        for probe, d in moves[heading[node]]:
+            if probe and not blk[node + probe]:
+                continue
+            vs, hs = d
+            if vs and hs:
+                nxt = diagonal(node, vs, hs)
+                move_cost = DIAG_COST
+            else:
+                nxt = line(node, vs or hs)
+                move_cost = STEP_COST
+            if nxt < 0:
+                continue
+            new_cost = cost + (nxt - node) // (vs + hs) * move_cost
+            if new_cost < best(nxt, UNSEEN):
+                cost_so_far[nxt] = new_cost
+                came_from[nxt] = node
+                heading[nxt] = d
+                push(nxt, new_cost)
+                added.append((nxt // W - 1) * cols + nxt % W - 1)
+        node = (node // W - 1) * cols + node % W - 1
+        yield Step(added, (node,), (node,))
+    yield Step()
+
+
+# ─────────────────────────────────────────────
+#  WAVEFRONT ENGINE
+# ─────────────────────────────────────────────
+# Settles a whole cost level of cells per iteration instead of one node
+# per Python step. With NumPy each level is a handful of array ops over a
+# zero-padded copy of the grid (so neighbour offsets never leave the
+# array); without it the same bucket loop runs in plain Python.
+_np = None
+
+def _numpy():
+    """NumPy module, or None when it is not installed (imported lazily)."""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:
+            _np = False
+        else:
+            _np = numpy
+    return _np or None
+
+def _dir_costs(weighted):
+    if not weighted:
+        return [1] * len(DIRECTIONS)
+    return [DIAG_COST if (dr and dc) else STEP_COST for dr, dc in DIRECTIONS]
+
+def _wavefront_np(grid, source, weighted, target, dist, dirs):
+    """Bucket wavefront over padded NumPy arrays; yields (cost, padded ids)."""
+    np = _numpy()
+    W = grid.cols + 2
+    offs = [dr*W + dc for dr, dc in DIRECTIONS]
+    costs = _dir_costs(weighted)
+    free = np.zeros((grid.rows + 2, W), dtype=bool)
+    free[1:-1, 1:-1] = np.frombuffer(grid.cells, dtype=np.uint8).reshape(
+        grid.rows, grid.cols) == FREE
+    free = free.ravel()
+    r, c = divmod(source, grid.cols)
+    src = (r + 1)*W + c + 1
+    tgt = -1
+    if target is not None:
+        r, c = divmod(target, grid.cols)
+        tgt = (r + 1)*W + c + 1
+    dist[src] = 0
+    buckets = {0: [np.array([src])]}
+    while buckets:
+        cur = min(buckets)
+        ids = np.concatenate(buckets.pop(cur))
+        if weighted:
+            ids = ids[dist[ids] == cur]     # drop entries improved since push
+            if not ids.size:
+                continue
+        yield cur, ids
+        if tgt >= 0 and dist[tgt] == cur:
+            return
+        for k in range(len(offs)):
+            nb = ids + offs[k]
+            nc = cur + costs[k]
+            nb = nb[free[nb] & (dist[nb] > nc)]
+            if nb.size:
+                dist[nb] = nc
+                dirs[nb] = k
+                buckets.setdefault(nc, []).append(nb)
+
+def _wavefront_py(grid, source, weighted, target, dist, dirs):
+    """Same bucket loop on cell ids in plain Python; yields (cost, ids)."""
+    cells, border = grid.cells, grid.border
+    costs = _dir_costs(weighted)
+    tables = [tuple((off, costs[k], k) for off, k in t) for t in _dir_tables(grid.cols)]
+    dist[source] = 0
+    buckets = {0: [source]}
+    while buckets:
+        cur = min(buckets)
+        ids = [i for i in buckets.pop(cur) if dist[i] == cur]
+        if not ids:
+            continue
+        yield cur, ids
+        if target is not None and dist[target] == cur:
+            return
+        for i in ids:
+            for off, cost, k in tables[border[i]]:
+                j = i + off
+                nc = cur + cost
+                if not cells[j] and dist[j] > nc:
+                    dist[j] = nc
+                    dirs[j] = k
+                    buckets.setdefault(nc, []).append(j)
+
+
+def _start_wavefront(grid, source, weighted, target, backend=None):
+    """Allocate the fields; returns (numpy or None, dist, dirs, levels)."""
+    np = _numpy() if backend != "python" else None
+    if backend == "numpy" and np is None:
+        raise RuntimeError("the numpy backend needs NumPy installed")
+    if np is not None:
+        size = (grid.rows + 2) * (grid.cols + 2)
+        dist = np.full(size, UNSEEN, dtype=np.int32)
+        dirs = np.full(size, -1, dtype=np.int8)
+        levels = _wavefront_np(grid, source, weighted, target, dist, dirs)
+    else:
+        dist = array("i", [UNSEEN]) * grid.size
+        dirs = array("b", [-1]) * grid.size
+        levels = _wavefront_py(grid, source, weighted, target, dist, dirs)
+    return np, dist, dirs, levels
+
+def _finish_field(grid, np, source, weighted, target, dist, dirs,
+                  radius, levels, expanded):
+    if np is not None:
+        shape = (grid.rows + 2, grid.cols + 2)
+        dist = dist.reshape(shape)[1:-1, 1:-1].ravel()
+        dirs = dirs.reshape(shape)[1:-1, 1:-1].ravel()
+    complete = target is None or int(dist[target]) != radius
+    return DistanceField(grid, source, weighted, dist, dirs, radius, complete,
+                         levels, expanded)
+
+
+class DistanceField:
+    """Single-source distance and parent-direction fields over a grid.
+
+    ``dist[i]`` is the step count (or, when ``weighted``, the 1.0/1.4 cost
+    scaled by COST_SCALE) from ``source`` to cell id ``i``, UNSEEN if not
+    reached; ``dirs[i]`` indexes DIRECTIONS for the move that entered
+    ``i``. A field stopped early at a target is only exact up to
+    ``radius``; ``complete`` fields cover the whole reachable region.
+    """
+
+    def __init__(self, grid, source, weighted, dist, dirs, radius, complete,
+                 levels, expanded):
+        self.rows, self.cols = grid.rows, grid.cols
+        self.source   = source
+        self.weighted = weighted
+        self.dist     = dist
+        self.dirs     = dirs
+        self.radius   = radius
+        self.complete = complete
+        self.levels   = levels
+        self.expanded = expanded
+        self.offsets  = [dr*grid.cols + dc for dr, dc in DIRECTIONS]
+
+    @property
+    def nbytes(self):
+        if hasattr(self.dist, "nbytes"):
+            return self.dist.nbytes + self.dirs.nbytes
+        return (len(self.dist) * self.dist.itemsize +
+                len(self.dirs) * self.dirs.itemsize)
+
+    def known(self, i):
+        d = int(self.dist[i])
+        return d != UNSEEN and (self.complete or d <= self.radius)
+
+    def distance(self, cell):
+        """Cost (steps when unweighted) from source to (r, c), or None."""
+        i = cell[0] * self.cols + cell[1]
+        if not self.known(i):
+            return None
+        d = int(self.dist[i])
+        return d / COST_SCALE if self.weighted else d
+
+    def path_to(self, cell):
+        """Cells from source to ``cell`` read off the parent field."""
+        i = cell[0] * self.cols + cell[1]
+        if not self.known(i):
+            return []
+        ids = [i]
+        dirs, offsets = self.dirs, self.offsets
+        while i != self.source:
+            i -= offsets[dirs[i]]
+            ids.append(i)
+        ids.reverse()
+        cols = self.cols
+        return [divmod(i, cols) for i in ids]
+
+    def path_from(self, cell):
+        """Cells from ``cell`` back to source (the grid is undirected)."""
+        path = self.path_to(cell)
+        path.reverse()
+        return path
+
+
+def distance_field(grid, source=None, weighted=False, target=None, backend=None,
+                   targets=None):
+    """Compute a DistanceField from ``source`` (default grid.start).
+
+    ``weighted`` uses the 1.0 / 1.4 costs of Grid.neighbors, otherwise every
+    move counts one step. With ``target`` the wavefront stops as soon as it
+    is settled; with ``targets`` (cells) once all of them are - callers
+    should leave out cells that cannot be reached, or the sweep runs to
+    exhaustion. ``backend`` is "numpy", "python" or None (NumPy if present).
+    """
+    src = grid.cell_id(*(source or grid.start))
+    tgt = grid.cell_id(*target) if target is not None else None
+    np, dist, dirs, levels = _start_wavefront(grid, src, weighted, tgt, backend)
+    goals = None
+    if targets is not None:
+        W = grid.cols + 2       # the NumPy fields are padded by one cell
+        goals = [(r + 1)*W + c + 1 if np is not None else r*grid.cols + c
+                 for r, c in targets]
+    count = expanded = radius = last = 0
+    stopped = False
+    for radius, ids in levels:
+        count += 1
+        last = len(ids)
+        expanded += last
+        if goals is not None and all(dist[g] <= radius for g in goals):
+            stopped = True
+            break
+    field = _finish_field(grid, np, src, weighted, tgt, dist, dirs,
+                          radius, count, expanded)
+    if stopped:
+        field.complete = False
+    if not field.complete:
+        field.expanded -= last      # the last level settled was never expanded
+    return field
+
+def wavefront_gen(grid, weighted=False, backend=None):
+    """Step generator for the wavefront backend: one Step per cost level.
+
+    The frontier shown is the next level to be settled.
+    """
+    src, tgt = grid.start_id, grid.target_id
+    np, dist, dirs, levels = _start_wavefront(grid, src, weighted, tgt, backend)
+    W, cols = grid.cols + 2, grid.cols
+    prev = None
+    count = 0
+    for cost, ids in levels:
+        count += 1
+        if np is not None:
+            ids = ((ids // W - 1) * cols + ids % W - 1).tolist()
+        if prev is None and tgt != src:
+            prev = ids              # level 0 is the start itself
+            continue
+        if tgt in ids:
+            field = _finish_field(grid, np, src, weighted, tgt, dist, dirs,
+                                  cost, count, 0)
+            ids.remove(tgt)
+            prev = prev or []
+            yield Step(ids, prev, prev, field.path_to(grid.target))
+            return
+        yield Step(ids, prev, prev)
+        prev = ids
+    if prev is not None:
+        yield Step(removed=prev, explored=prev)
+
+
+# ─────────────────────────────────────────────
+#  COMPACT SEARCH
+# ─────────────────────────────────────────────
+# BFS / UCS for grids too large for per-cell dicts. The default mode keeps
+# one "closed" bit and one 3-bit parent direction per cell (half a byte a
+# cell) and only the open cells in a dict. When even that would break
+# ``max_bytes`` the search degrades to frontier search: only cells within
+# one move cost of the current cost level are remembered (a settled
+# neighbour can never be further away than that), and the path is rebuilt
+# by divide and conquer - a second sweep records the cell where the path
+# crosses half the cost, and both halves are solved again the same way.
+# Border classes come from divmod, so the byte-per-cell Grid.border plane
+# is never built.
+COMPACT_MAX_BYTES = 256 << 20
+_ENTRY_BYTES = 120          # rough cost of one dict / heap entry
+_CHECK_EVERY = 4096         # expansions between memory checks
+
+class PackedDirs:
+    """3-bit codes (DIRECTIONS indices) for ``n`` cells in one bytearray."""
+
+    def __init__(self, n):
+        self.data = bytearray((3 * n + 7) // 8 + 1)   # + 1: codes span 2 bytes
+
+    def __getitem__(self, i):
+        bit = 3 * i
+        j = bit >> 3
+        return ((self.data[j] | self.data[j+1] << 8) >> (bit & 7)) & 7
+
+    def __setitem__(self, i, code):
+        bit = 3 * i
+        j, s = bit >> 3, bit & 7
+        data = self.data
+        v = (data[j] | data[j+1] << 8) & ~(7 << s) | code << s
+        data[j], data[j+1] = v & 0xFF, v >> 8
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+def compact_bytes(grid):
+    """Fixed memory of the bitset mode: closed bits plus packed parents."""
+    return (grid.size + 7) // 8 + (3 * grid.size + 7) // 8 + 1
+
+def _border_class(grid, i):
+    """Border class of cell id ``i`` (see _move_tables), without Grid.border."""
+    r, c = divmod(i, grid.cols)
+    return ((c == 0) | (c == grid.cols - 1) << 1 |
+            (r == 0) << 2 | (r == grid.rows - 1) << 3)
+
+def _compact_tables(grid, weighted):
+    """Per border class: (id offset, integer cost, direction index)."""
+    costs = _dir_costs(weighted)
+    return [tuple((off, costs[k], k) for off, k in t) for t in _dir_tables(grid.cols)]
+
+def _bitset_search(grid, source, target, tables, max_bytes, stats):
+    """Closed bitset + PackedDirs search; ids from source to target, [] when
+    unreachable, None when the open list outgrows ``max_bytes``."""
+    cells, cols = grid.cells, grid.cols
+    last_r, last_c = grid.rows - 1, cols - 1
+    closed = bytearray((grid.size + 7) // 8)
+    parent = PackedDirs(grid.size)
+    offsets = [dr*grid.cols + dc for dr, dc in DIRECTIONS]
+    fixed = len(closed) + parent.nbytes
+    open_cost = {source: 0}
+    heap = [(0, source)]
+    expanded = 0
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if closed[node >> 3] & (1 << (node & 7)) or open_cost[node] != cost:
+            continue
+        del open_cost[node]
+        closed[node >> 3] |= 1 << (node & 7)
+        if node == target:
+            break
+        expanded += 1
+        if not expanded % _CHECK_EVERY:
+            used = fixed + _ENTRY_BYTES * (len(heap) + len(open_cost))
+            stats["peak_bytes"] = max(stats["peak_bytes"], used)
+            if used > max_bytes:
+                stats["expanded"] += expanded
+                return None
+        r, c = divmod(node, cols)
+        cls = (c == 0) | (c == last_c) << 1 | (r == 0) << 2 | (r == last_r) << 3
+        for off, step, k in tables[cls]:
+            nxt = node + off
+            if cells[nxt] or closed[nxt >> 3] & (1 << (nxt & 7)):
+                continue
+            new_cost = cost + step
+            if new_cost < open_cost.get(nxt, UNSEEN):
+                open_cost[nxt] = new_cost
+                parent[nxt] = k
+                heapq.heappush(heap, (new_cost, nxt))
+    stats["expanded"] += expanded
+    stats["peak_bytes"] = max(stats["peak_bytes"],
+                              fixed + _ENTRY_BYTES * (len(heap) + len(open_cost)))
+    if not closed[target >> 3] & (1 << (target & 7)):
+        return []
+    ids = [target]
+    node = target
+    while node != source:
+        node -= offsets[parent[node]]
+        ids.append(node)
+    ids.reverse()
+    return ids
+
+def _frontier_sweep(grid, source, target, tables, band, max_bytes, stats,
+                    half=None):
+    """One frontier search from source. Returns None when target is
+    unreachable, else (cost, relay, relay cost, target's parent), where the
+    relay is the first cell of the path costing at least ``half`` (None
+    without ``half``). Raises MemoryError past ``max_bytes``."""
+    cells, cols = grid.cells, grid.cols
+    last_r, last_c = grid.rows - 1, cols - 1
+    open_cost = {source: 0}
+    parent = {source: None}
+    relay = {}
+    closed = {}                 # cost level -> cells settled at it
+    heap = [(0, source)]
+    low = 0                     # lowest level still kept in ``closed``
+    settled = set()
+    expanded = 0
+    try:
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if node in settled or open_cost.get(node) != cost:
+                continue
+            del open_cost[node]
+            while low < cost - band:
+                settled.difference_update(closed.pop(low, ()))
+                low += 1
+            if node == target:
+                return cost, *relay.get(node, (None, None)), parent[node]
+            settled.add(node)
+            closed.setdefault(cost, []).append(node)
+            parent.pop(node)
+            via = relay.pop(node, None)
+            expanded += 1
+            if not expanded % _CHECK_EVERY:
+                used = _ENTRY_BYTES * (len(heap) + len(open_cost) + 2 * len(settled))
+                stats["peak_bytes"] = max(stats["peak_bytes"], used)
+                if used > max_bytes:
+                    raise MemoryError(f"frontier of {len(open_cost)} cells "
+                                      f"exceeds max_bytes={max_bytes}")
+            r, c = divmod(node, cols)
+            cls = (c == 0) | (c == last_c) << 1 | (r == 0) << 2 | (r == last_r) << 3
+            for off, step, _ in tables[cls]:
+                nxt = node + off
+                if cells[nxt] or nxt in settled:
+                    continue
+                new_cost = cost + step
+                if new_cost < open_cost.get(nxt, UNSEEN):
+                    open_cost[nxt] = new_cost
+                    parent[nxt] = node
+                    if via is not None:
+                        relay[nxt] = via
+                    elif half is not None and new_cost >= half:
+                        relay[nxt] = (nxt, new_cost)
+                    heapq.heappush(heap, (new_cost, nxt))
+        return None
+    finally:
+        used = _ENTRY_BYTES * (len(heap) + len(open_cost) + 2 * len(settled))
+        stats["peak_bytes"] = max(stats["peak_bytes"], used)
+        stats["expanded"] += expanded
+        stats["sweeps"] += 1
+
+def _frontier_path(grid, source, target, tables, band, max_bytes, stats, cost=None):
+    """Ids from source to target by divide and conquer over frontier sweeps."""
+    if source == target:
+        return [source]
+    if any(source + off == target for off, _, _ in tables[_border_class(grid, source)]):
+        return [source, target]     # one move is never beaten by two
+    if cost is None:
+        found = _frontier_sweep(grid, source, target, tables, band, max_bytes, stats)
+        if found is None:
+            return []
+        cost = found[0]
+    _, mid, mid_cost, back = _frontier_sweep(grid, source, target, tables, band,
+                                             max_bytes, stats, half=cost // 2)
+    if mid is None or mid == target:
+        mid, mid_cost = back, None      # only the last move crosses half
+    head = _frontier_path(grid, source, mid, tables, band, max_bytes, stats, mid_cost)
+    tail = _frontier_path(grid, mid, target, tables, band, max_bytes, stats,
+                          None if mid_cost is None else cost - mid_cost)
+    return head[:-1] + tail
+
+def compact_search(grid, weighted=False, max_bytes=COMPACT_MAX_BYTES,
+                   source=None, target=None):
+    """Memory-bounded BFS (unit costs) or UCS (Grid.imoves costs).
+
+    Uses the bitset mode when its half byte per cell fits ``max_bytes``
+    and falls back to frontier search otherwise, or when the open list
+    itself grows too large. Returns a dict with the path as (r, c) cells,
+    ``mode`` ("bitset" or "frontier"), expanded cells over all sweeps and
+    the estimated peak bytes. Raises MemoryError only when a single
+    frontier does not fit.
+    """
+    source = grid.start_id if source is None else grid.cell_id(*source)
+    target = grid.target_id if target is None else grid.cell_id(*target)
+    tables = _compact_tables(grid, weighted)
+    stats = {"mode": "bitset", "expanded": 0, "sweeps": 0, "peak_bytes": 0}
+    ids = None
+    if compact_bytes(grid) <= max_bytes:
+        stats["sweeps"] = 1
+        ids = _bitset_search(grid, source, target, tables, max_bytes, stats)
+    if ids is None:
+        stats["mode"] = "frontier"
+        band = DIAG_COST if weighted else 1
+        ids = _frontier_path(grid, source, target, tables, band, max_bytes, stats)
+    stats["path"] = grid.to_cells(ids)
+    return stats
+
+def compact_gen(grid, weighted=False, max_bytes=COMPACT_MAX_BYTES):
+    """Step generator for the compact backend: the search runs in one go
+    and yields a single Step with its path (there is no per-cell trace)."""
+    yield Step(path=compact_search(grid, weighted, max_bytes)["path"])
+
+
+# ─────────────────────────────────────────────
+#  DISTANCE-FIELD CACHE
+# ─────────────────────────────────────────────
+class FieldCache:
+    """LRU cache of complete DistanceFields keyed by (grid, source, weighted).
+
+    Every stored field is stamped with ``Grid.version``. The cache observes
+    each grid it holds fields for; on a change it drops only the fields
+    whose reachable region touches the changed cell (a cell blocked inside
+    it, or a cell freed next to it) and re-stamps the others. The stored
+    fields never exceed ``max_bytes`` in total; the least recently used
+    ones are evicted first.
+    """
+
+    def __init__(self, max_bytes=64 << 20, backend=None):
+        self.max_bytes = max_bytes
+        self.backend   = backend
+        self.nbytes    = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.built     = None     # field computed by the latest miss
+        self._entries  = OrderedDict()   # (gid, source, weighted) -> [version, field]
+        self._keys     = {}              # gid -> set of keys for that grid
+        self._grids    = {}              # gid -> (weakref to grid, observer)
+
+    @property
+    def stats(self):
+        return {
+            "hits":          self.hits,
+            "misses":        self.misses,
+            "evictions":     self.evictions,
+            "invalidations": self.invalidations,
+            "entries":       len(self._entries),
+            "nbytes":        self.nbytes,
+        }
+
+    def _lookup(self, grid, source, weighted):
+        key = (id(grid), source, weighted)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != grid.version:        # changed behind our back
+            self._drop(key)
+            self.invalidations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def field(self, grid, source=None, weighted=False):
+        """Complete DistanceField from ``source`` (default grid.start)."""
+        src = grid.cell_id(*(source or grid.start))
+        self.built = None
+        field = self._lookup(grid, src, weighted)
+        if field is not None:
+            self.hits += 1
+            return field
+        self.misses += 1
+        return self._build(grid, src, weighted)
+
+    def path(self, grid, start=None, target=None, weighted=False):
+        """Cells from ``start`` to ``target`` (defaults: grid.start/target).
+
+        Served in O(path length) from a field rooted at either end; on a
+        miss the field is built from ``target``, which is what repeated
+        queries against one goal share.
+        """
+        start  = start or grid.start
+        target = target or grid.target
+        path = self.cached_path(grid, start, target, weighted)
+        if path is not None:
+            return path
+        return self._build(grid, grid.cell_id(*target), weighted).path_from(start)
+
+    def cached_path(self, grid, start, target, weighted=False):
+        """Like path(), but None on a miss instead of building a field."""
+        s, t = grid.cell_id(*start), grid.cell_id(*target)
+        self.built = None
+        field = self._lookup(grid, s, weighted)
+        if field is not None:
+            self.hits += 1
+            return field.path_to(target)
+        field = self._lookup(grid, t, weighted)
+        if field is not None:
+            self.hits += 1
+            return field.path_from(start)
+        self.misses += 1
+        return None
+
+    def _build(self, grid, source, weighted):
+        field = distance_field(grid, grid.cell(source), weighted,
+                               backend=self.backend)
+        self.built = field
+        self.store(grid, field)
+        return field
+
+    def store(self, grid, field):
+        """Keep a complete ``field`` computed elsewhere on ``grid`` as it is
+        now (e.g. on a worker thread while the grid could not change)."""
+        if field.nbytes > self.max_bytes or not field.complete:
+            return
+        source, weighted = field.source, field.weighted
+        gid = id(grid)
+        if gid not in self._grids:
+            self._watch(grid)
+        key = (gid, source, weighted)
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = [grid.version, field]
+        self._keys[gid].add(key)
+        self.nbytes += field.nbytes
+        while self.nbytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _watch(self, grid):
+        gid = id(grid)
+        ref = weakref.ref(grid)     # the cache must not keep grids alive
+
+        def on_change(i, old, new):
+            self._on_change(ref(), i, old, new)
+
+        grid.add_observer(on_change)
+        self._grids[gid] = (ref, on_change)
+        self._keys[gid] = set()
+        weakref.finalize(grid, self._forget, gid)
+
+    def _on_change(self, grid, i, old, new):
+        keys = self._keys.get(id(grid))
+        if not keys:
+            return
+        if (old == FREE) == (new == FREE):
+            touched = ()
+        elif new == FREE:
+            touched = [i + off for off, _ in grid.moves[grid.border[i]]]
+        else:
+            touched = (i,)
+        for key in list(keys):
+            entry = self._entries[key]
+            field = entry[1]
+            if any(field.dist[j] != UNSEEN for j in touched):
+                self._drop(key)
+                self.invalidations += 1
+            else:
+                entry[0] = grid.version
+
+    def _drop(self, key):
+        field = self._entries.pop(key)[1]
+        self.nbytes -= field.nbytes
+        self._keys[key[0]].discard(key)
+
+    def _forget(self, gid):
+        for key in self._keys.pop(gid, ()):
+            self.nbytes -= self._entries.pop(key)[1].nbytes
+        self._grids.pop(gid, None)
+
+    def clear(self):
+        for key in list(self._entries):
+            self._drop(key)
+
+    def close(self):
+        """Empty the cache and stop observing its grids."""
+        self.clear()
+        for gid, (ref, fn) in list(self._grids.items()):
+            grid = ref()
+            if grid is not None:
+                grid.remove_observer(fn)
+            self._grids.pop(gid)
+            self._keys.pop(gid, None)
 
-        yield frontier.copy(), explored.copy(), []
-    yield set(), set(), []
+
+# ─────────────────────────────────────────────
+#  INCREMENTAL REPLANNING
+# ─────────────────────────────────────────────
+INF = float("inf")
+
+class IncrementalUCS:
+    """Lifelong uniform-cost search (LPA* with a zero heuristic).
+
+    g / rhs values survive between calls to ``compute()``: the planner
+    observes the grid, and every wall added or removed since the last call
+    only re-opens the cells whose cost actually changed. Costs are the
+    exact integers from ``Grid.imoves``. Each call appends a record with
+    the number of changed cells, re-expanded nodes and latency to
+    ``events`` (the newest is also ``last``).
+    """
+
+    def __init__(self, grid):
+        self.grid   = grid
+        self.start  = grid.start_id
+        self.target = grid.target_id
+        self.g      = {}
+        self.rhs    = {self.start: 0}
+        self.queue  = [(0, self.start)]
+        self.queued = {self.start: 0}     # cell -> live key in queue
+        self.pending = set()
+        self.events = []
+        self.last   = None
+        grid.add_observer(self._on_change)
+
+    def close(self):
+        self.grid.remove_observer(self._on_change)
+
+    def _on_change(self, i, old, new):
+        if (old == FREE) != (new == FREE):
+            self.pending.add(i)
+
+    @property
+    def cost(self):
+        g = self.g.get(self.target, INF)
+        return g / COST_SCALE if g != INF else None
+
+    def _update(self, u):
+        grid, g, rhs = self.grid, self.g, self.rhs
+        if u != self.start:
+            best = INF
+            if not grid.cells[u]:
+                cells = grid.cells
+                for off, c in grid.imoves[grid.border[u]]:
+                    p = u + off
+                    if not cells[p]:
+                        v = g.get(p, INF) + c
+                        if v < best:
+                            best = v
+            if best == INF:
+                rhs.pop(u, None)
+            else:
+                rhs[u] = best
+        gu, ru = g.get(u, INF), rhs.get(u, INF)
+        if gu != ru:
+            k = min(gu, ru)
+            if self.queued.get(u) != k:
+                self.queued[u] = k
+                heapq.heappush(self.queue, (k, u))
+        else:
+            self.queued.pop(u, None)
+
+    def _update_around(self, u):
+        moves = self.grid.imoves[self.grid.border[u]]
+        for off, _ in moves:
+            self._update(u + off)
+
+    def _compute_shortest_path(self):
+        g, rhs, queue, queued = self.g, self.rhs, self.queue, self.queued
+        target = self.target
+        expanded = 0
+        while queue:
+            k, u = queue[0]
+            if queued.get(u) != k:
+                heapq.heappop(queue)          # stale entry
+                continue
+            gt, rt = g.get(target, INF), rhs.get(target, INF)
+            if k >= min(gt, rt) and gt == rt:
+                break
+            heapq.heappop(queue)
+            del queued[u]
+            expanded += 1
+            if g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+            else:
+                g.pop(u, None)
+                self._update(u)
+            self._update_around(u)
+        return expanded
+
+    def _extract_path(self):
+        grid, g = self.grid, self.g
+        if g.get(self.target, INF) == INF or grid.cells[self.start]:
+            return []
+        cells = grid.cells
+        path = [self.target]
+        cur = self.target
+        while cur != self.start:
+            best, nxt = INF, None
+            for off, c in grid.imoves[grid.border[cur]]:
+                p = cur + off
+                if not cells[p]:
+                    v = g.get(p, INF) + c
+                    if v < best:
+                        best, nxt = v, p
+            if nxt is None or len(path) > grid.size:
+                return []
+            path.append(nxt)
+            cur = nxt
+        path.reverse()
+        return grid.to_cells(path)
+
+    def compute(self):
+        """Repair the search after pending grid changes; returns the path."""
+        t0 = time.perf_counter()
+        changed = len(self.pending)
+        for i in self.pending:
+            self._update(i)
+            self._update_around(i)
+        self.pending.clear()
+        expanded = self._compute_shortest_path()
+        path = self._extract_path()
+        self.last = {
+            "changed":  changed,
+            "expanded": expanded,
+            "latency":  time.perf_counter() - t0,
+            "cost":     self.cost,
+        }
+        self.events.append(self.last)
+        return path
+
+
+# ─────────────────────────────────────────────
+#  HIERARCHICAL SEARCH
+# ─────────────────────────────────────────────
+def octile_bound(a, b):
+    """Lower bound on the 1.0 / 1.4 cost between cells ``a`` and ``b``."""
+    dr, dc = abs(a[0] - b[0]), abs(a[1] - b[1])
+    lo, hi = min(dr, dc), max(dr, dc)
+    return (STEP_COST*(hi - lo) + DIAG_COST*lo) / COST_SCALE
+
+def _free_runs(cells, ids):
+    """(first, last) positions of the runs of free cells along ``ids``."""
+    runs, first = [], None
+    for k, i in enumerate(ids):
+        if not cells[i]:
+            if first is None:
+                first = k
+        elif first is not None:
+            runs.append((first, k - 1))
+            first = None
+    if first is not None:
+        runs.append((first, len(ids) - 1))
+    return runs
+
+
+class ClusterGraph:
+    """Abstract graph of cluster entrances for hierarchical search (HPA*).
+
+    The grid is cut into ``size`` x ``size`` clusters. Wherever two
+    neighbouring clusters (side by side or corner to corner) touch through
+    free cells, an entrance pair of cells is linked by a single move.
+    Openings of a border that join the same two cluster-local regions are
+    merged: one entrance at the widest, or one at each far end when they
+    span at least SPLIT cells. Inside a cluster, entrances are
+    linked by their cluster-local UCS costs, computed the first time a
+    search reaches them and cached, as are the refined routes. A query
+    searches this small graph, then refines only the clusters on the
+    chosen route, so paths are always found when one exists but may be
+    longer than optimal; ``last`` reports the cost against the octile
+    lower bound. Like IncrementalUCS it observes the grid, and a wall
+    added or removed only rebuilds the clusters it touches.
+    """
+
+    SPLIT = 6       # merged openings at least this wide get two entrances
+
+    def __init__(self, grid, size=CLUSTER_SIZE):
+        self.grid  = grid
+        self.size  = size
+        self.crows = -(-grid.rows // size)
+        self.ccols = -(-grid.cols // size)
+        self.nodes   = [{} for _ in range(self.crows * self.ccols)]  # cell -> refs
+        self.links   = {}     # entrance -> {entrance across a border: cost}
+        self.borders = {}     # (kind, cr, cc) -> [(a, b, cost)]
+        self.intra   = {}     # entrance -> {entrance in its cluster: cost}
+        self.routes  = {}     # cluster -> {(u, v): [cell ids]}
+        self.labels  = {}     # cluster -> {rim cell: local region}
+        self.pending = set()
+        self.rebuilt = self.searches = 0
+        self.last    = None
+        for cr in range(self.crows):
+            for cc in range(self.ccols):
+                for kind in "hvx":
+                    self._link((kind, cr, cc))
+        grid.add_observer(self._on_change)
+
+    def close(self):
+        self.grid.remove_observer(self._on_change)
+
+    @property
+    def stats(self):
+        return {
+            "clusters":  len(self.nodes),
+            "entrances": len(self.links),
+            "links":     sum(len(v) for v in self.links.values()) // 2,
+            "cached":    len(self.intra),
+            "routes":    sum(len(v) for v in self.routes.values()),
+            "rebuilt":   self.rebuilt,
+            "searches":  self.searches,
+        }
+
+    def cluster(self, i):
+        r, c = divmod(i, self.grid.cols)
+        return (r // self.size) * self.ccols + c // self.size
+
+    # ── entrances ─────────────────────────────
+    def _regions(self, k):
+        """{rim cell: region} for cluster ``k``, where regions are its
+        8-connected free areas (union-find over runs of free cells)."""
+        labels = self.labels.get(k)
+        if labels is not None:
+            return labels
+        grid, S = self.grid, self.size
+        cells, cols = grid.cells, grid.cols
+        r0, c0 = (k // self.ccols) * S, (k % self.ccols) * S
+        r1, c1 = min(r0 + S, grid.rows), min(c0 + S, cols)
+        parent = []
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        rows, prev = [], []
+        for r in range(r0, r1):
+            base = r * cols
+            runs = []
+            for m in _FREE_RUN.finditer(cells, base + c0, base + c1):
+                a, b = m.start() - base, m.end() - 1 - base
+                run = len(parent)
+                parent.append(run)
+                for pa, pb, other in prev:
+                    if pa <= b + 1 and a <= pb + 1:
+                        parent[find(other)] = find(run)
+                runs.append((a, b, run))
+            rows.append(runs)
+            prev = runs
+        labels = self.labels[k] = {}
+        for r, runs in zip(range(r0, r1), rows):
+            base = r * cols
+            for a, b, run in runs:
+                region = find(run)
+                if r == r0 or r == r1 - 1:
+                    for c in range(a, b + 1):
+                        labels[base + c] = region
+                else:
+                    if a == c0:
+                        labels[base + a] = region
+                    if b == c1 - 1:
+                        labels[base + b] = region
+        return labels
+
+    def _entrances(self, key):
+        """[(a, b, cost)] linking the clusters on either side of ``key``.
+
+        "h" is the border right of cluster (cr, cc), "v" the one below it
+        and "x" the corner at its bottom right.
+        """
+        kind, cr, cc = key
+        grid, S = self.grid, self.size
+        cells, cols = grid.cells, grid.cols
+        if kind == "x":
+            R, C = (cr + 1) * S, (cc + 1) * S
+            if R >= grid.rows or C >= cols:
+                return []
+            pairs = (((R-1)*cols + C-1, R*cols + C), ((R-1)*cols + C, R*cols + C-1))
+            return [(a, b, DIAG_COST) for a, b in pairs if not cells[a] and not cells[b]]
+        if kind == "h":
+            c = (cc + 1) * S - 1
+            if c + 1 >= cols:
+                return []
+            a_ids = [r*cols + c for r in range(cr*S, min((cr+1)*S, grid.rows))]
+            step = 1
+        else:
+            r = (cr + 1) * S - 1
+            if r + 1 >= grid.rows:
+                return []
+            a_ids = [r*cols + c for c in range(cc*S, min((cc+1)*S, cols))]
+            step = cols
+        b_ids = [a + step for a in a_ids]
+        # openings as (first, last, [entrance at first, middle, last])
+        openings = []
+        for a0, a1 in _free_runs(cells, a_ids):
+            for b0, b1 in _free_runs(cells, b_ids):
+                if b0 > a1 + 1 or a0 > b1 + 1:
+                    continue
+                lo, hi = max(a0, b0), min(a1, b1)
+                if lo <= hi:
+                    picks = [(a_ids[k], b_ids[k], STEP_COST) for k in (lo, (lo + hi) // 2, hi)]
+                elif b0 == a1 + 1:      # the runs only touch diagonally
+                    lo = hi = a1
+                    picks = [(a_ids[a1], b_ids[b0], DIAG_COST)] * 3
+                else:
+                    lo = hi = a0
+                    picks = [(a_ids[a0], b_ids[b1], DIAG_COST)] * 3
+                openings.append((lo, hi, picks))
+        a_regions = self._regions(self.cluster(a_ids[0]))
+        b_regions = self._regions(self.cluster(b_ids[0]))
+        groups = {}
+        for opening in openings:
+            a, b, _ = opening[2][0]
+            groups.setdefault((a_regions[a], b_regions[b]), []).append(opening)
+        found = []
+        for group in groups.values():
+            first, last = min(group), max(group, key=lambda o: o[1])
+            if last[1] - first[0] + 1 >= self.SPLIT:
+                found += [first[2][0], last[2][2]]
+            else:
+                widest = max(group, key=lambda o: o[1] - o[0])
+                found.append(widest[2][1])
+        return sorted(found)
+
+    def _link(self, key):
+        found = self._entrances(key)
+        if found:
+            self.borders[key] = found
+        for a, b, cost in found:
+            for u, v in ((a, b), (b, a)):
+                refs = self.nodes[self.cluster(u)]
+                refs[u] = refs.get(u, 0) + 1
+                self.links.setdefault(u, {})[v] = cost
+        return found
+
+    def _unlink(self, key):
+        found = self.borders.pop(key, [])
+        for a, b, cost in found:
+            for u, v in ((a, b), (b, a)):
+                refs = self.nodes[self.cluster(u)]
+                refs[u] -= 1
+                if not refs[u]:
+                    del refs[u]
+                    self.intra.pop(u, None)
+                out = self.links[u]
+                out.pop(v, None)
+                if not out:
+                    del self.links[u]
+        return found
+
+    def _on_change(self, i, old, new):
+        if (old == FREE) != (new == FREE):
+            self.pending.add(i)
+
+    def _refresh(self):
+        """Rebuild the entrances and caches of clusters touched by changes."""
+        if not self.pending:
+            return 0
+        dirty = {self.cluster(i) for i in self.pending}
+        self.pending.clear()
+        # a change anywhere in a cluster may split or join its regions, so
+        # every border around it is re-linked
+        keys = set()
+        for k in dirty:
+            self.labels.pop(k, None)
+            cr, cc = divmod(k, self.ccols)
+            keys.update({("h", cr, cc), ("h", cr, cc - 1), ("v", cr, cc), ("v", cr - 1, cc)})
+            keys.update(("x", y, x) for y in (cr - 1, cr) for x in (cc - 1, cc))
+        keys = {key for key in keys if key[1] >= 0 and key[2] >= 0}
+        for key in keys:
+            old, new = self._unlink(key), self._link(key)
+            if old != new:
+                for a, b, _ in old + new:
+                    dirty.add(self.cluster(a))
+                    dirty.add(self.cluster(b))
+        for k in dirty:
+            for u in self.nodes[k]:
+                self.intra.pop(u, None)
+            self.routes.pop(k, None)
+        self.rebuilt += len(dirty)
+        return len(dirty)
+
+    # ── cluster-local search ──────────────────
+    def _local(self, source, goal=None):
+        """UCS from ``source`` that never leaves its cluster.
+
+        Returns (cost, came_from) dicts; stops once ``goal`` is settled.
+        """
+        grid, S = self.grid, self.size
+        cells, imoves, border, cols = grid.cells, grid.imoves, grid.border, grid.cols
+        r, c = divmod(source, cols)
+        r0, c0 = r - r % S, c - c % S
+        c1 = min(c0 + S, cols)
+        inside = {i for row in range(r0, min(r0 + S, grid.rows))
+                  for i in range(row*cols + c0, row*cols + c1) if not cells[i]}
+        self.searches += 1
+        cost = {source: 0}
+        came_from = {source: None}
+        heap = [(0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > cost[node]:
+                continue
+            if node == goal:
+                break
+            for off, move_cost in imoves[border[node]]:
+                nxt = node + off
+                if nxt not in inside:
+                    continue
+                nd = d + move_cost
+                if nd < cost.get(nxt, UNSEEN):
+                    cost[nxt] = nd
+                    came_from[nxt] = node
+                    heapq.heappush(heap, (nd, nxt))
+        return cost, came_from
+
+    def _edges(self, u):
+        """Cached {entrance: cost} within the cluster of entrance ``u``."""
+        edges = self.intra.get(u)
+        if edges is None:
+            self._connect(self.cluster(u))
+            edges = self.intra[u]
+        return edges
+
+    def _connect(self, k):
+        """Fill ``intra`` for every entrance of cluster ``k`` at once.
+
+        With NumPy all entrances relax the cluster together as one stack of
+        cost planes (Bellman-Ford over the 8 moves until nothing improves);
+        otherwise one cluster-local UCS runs per entrance.
+        """
+        nodes = list(self.nodes[k])
+        np = _numpy()
+        if np is None or len(nodes) < 2:
+            for u in nodes:
+                cost = self._local(u)[0]
+                self.intra[u] = {v: cost[v] for v in nodes if v != u and v in cost}
+            return
+        grid, S = self.grid, self.size
+        r0, c0 = (k // self.ccols) * S, (k % self.ccols) * S
+        h, w = min(S, grid.rows - r0), min(S, grid.cols - c0)
+        plane = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.rows, grid.cols)
+        blocked = np.ones((h + 2, w + 2), dtype=bool)
+        blocked[1:-1, 1:-1] = plane[r0:r0+h, c0:c0+w] != FREE
+        far = np.int32(UNSEEN // 2)
+        dist = np.full((len(nodes), h + 2, w + 2), far, dtype=np.int32)
+        at = [(i // grid.cols - r0 + 1, i % grid.cols - c0 + 1) for i in nodes]
+        for j, (r, c) in enumerate(at):
+            dist[j, r, c] = 0
+        inner = (slice(None), slice(1, h + 1), slice(1, w + 1))
+        while True:
+            new = dist.copy()
+            for (dr, dc), cost in zip(DIRECTIONS, _dir_costs(True)):
+                np.minimum(new[inner], dist[:, 1+dr:h+1+dr, 1+dc:w+1+dc] + cost,
+                           out=new[inner])
+            new[:, blocked] = far
+            if np.array_equal(new, dist):
+                break
+            dist = new
+        self.searches += len(nodes)
+        for j, u in enumerate(nodes):
+            row = dist[j]
+            self.intra[u] = {v: int(row[rc]) for v, rc in zip(nodes, at)
+                             if v != u and row[rc] < far}
+
+    def _route(self, u, v):
+        """Cell ids from ``u`` to ``v`` inside their cluster, cached for entrances."""
+        k = self.cluster(u)
+        routes = self.routes.setdefault(k, {})
+        route = routes.get((u, v))
+        if route is None:
+            route = reconstruct(self._local(u, v)[1], u, v)
+            if u in self.nodes[k] and v in self.nodes[k]:
+                routes[(u, v)] = route
+                routes[(v, u)] = route[::-1]
+        return route
+
+    def precompute(self):
+        """Compute the intra-cluster costs of every cluster up front."""
+        for k, nodes in enumerate(self.nodes):
+            if any(u not in self.intra for u in nodes):
+                self._connect(k)
+
+    # ── queries ───────────────────────────────
+    def steps(self, start=None, target=None):
+        """Step generator for one query (default grid.start/target).
+
+        Steps expand abstract nodes (the endpoints and entrances); the
+        last one carries the refined path. ``last`` is set when it ends.
+        """
+        t0 = time.perf_counter()
+        grid = self.grid
+        start, target = start or grid.start, target or grid.target
+        rebuilt = self._refresh()
+        searches = self.searches
+        s, t = grid.cell_id(*start), grid.cell_id(*target)
+        ks, kt = self.cluster(s), self.cluster(t)
+        path, expanded = [], 0
+        if grid.connected(start, target):
+            from_s = self._local(s)[0]
+            out_s = {v: from_s[v] for v in self.nodes[ks] if v in from_s}
+            if t in from_s:
+                out_s[t] = from_s[t]
+            to_t = self._local(t)[0]
+            in_t = {v: to_t[v] for v in self.nodes[kt] if v in to_t}
+            g = {s: 0}
+            came_from = {s: None}
+            tr, tc = target
+            cols = grid.cols
+
+            def h(i):      # octile distance to the target in integer costs
+                dr, dc = abs(i // cols - tr), abs(i % cols - tc)
+                return STEP_COST*abs(dr - dc) + DIAG_COST*min(dr, dc)
+
+            # A* on the abstract graph; ties go to the deeper node
+            heap = [(h(s), 0, s)]
+            while heap:
+                _, neg_g, node = heapq.heappop(heap)
+                if -neg_g > g[node]:
+                    continue
+                expanded += 1
+                if node == t:
+                    break
+                nbrs = list(self.links.get(node, {}).items())
+                nbrs += (out_s if node == s else self._edges(node)).items()
+                if node in in_t:
+                    nbrs.append((t, in_t[node]))
+                added = []
+                for nxt, step in nbrs:
+                    new = g[node] + step
+                    if new < g.get(nxt, UNSEEN):
+                        g[nxt] = new
+                        came_from[nxt] = node
+                        heapq.heappush(heap, (new + h(nxt), -new, nxt))
+                        added.append(nxt)
+                yield Step(added, (node,), (node,))
+            abstract = reconstruct(came_from, s, t)
+            ids = [s]
+            for u, v in zip(abstract, abstract[1:]):
+                if self.cluster(u) == self.cluster(v):
+                    ids += self._route(u, v)[1:]
+                else:
+                    ids.append(v)
+            path = grid.to_cells(ids)
+        cost = round(path_cost(path), 4) if path else None
+        bound = octile_bound(start, target)
+        self.last = {
+            "found":       bool(path),
+            "cost":        cost,
+            "lower_bound": bound,
+            "ratio":       cost / bound if path and bound else (1.0 if path else None),
+            "expanded":    expanded,
+            "searches":    self.searches - searches,
+            "rebuilt":     rebuilt,
+            "elapsed":     time.perf_counter() - t0,
+        }
+        yield Step(removed=(t,), path=path) if path else Step()
+
+    def path(self, start=None, target=None):
+        """Path of (r, c) cells for one query, [] if there is none."""
+        step = None
+        for step in self.steps(start, target):
+            pass
+        return list(step.path)
+
+def hierarchical_gen(grid, graph=None, size=CLUSTER_SIZE):
+    """UCS backend answered by ``graph``, by default the grid's own
+    (Grid.cluster_graph), so its caches carry over between queries."""
+    yield from (graph or grid.cluster_graph(size)).steps(grid.start, grid.target)
+
+
+# ─────────────────────────────────────────────
+#  HEADLESS SOLVER
+# ─────────────────────────────────────────────
+SEARCH_GENS = {
+    "BFS":           bfs_gen,
+    "DFS":           dfs_gen,
+    "UCS":           ucs_gen,
+    "DLS":           dls_gen,
+    "IDDFS":         iddfs_gen,
+    "Bidirectional": bidirectional_gen,
+}
+
+# Alternative engines per algorithm, selected with backend=...
+SEARCH_BACKENDS = {
+    "BFS":           {"wavefront": wavefront_gen,
+                      "compact":   compact_gen},
+    "UCS":           {"bidirectional": bidirectional_ucs_gen,
+                      "bucket":        partial(ucs_gen, queue=BucketQueue),
+                      "compact":       partial(compact_gen, weighted=True),
+                      "hierarchical":  hierarchical_gen,
+                      "jump":          jump_ucs_gen},
+    "Bidirectional": {"wavefront": wavefront_gen},
+}
+BACKEND_NAMES = sorted({name for engines in SEARCH_BACKENDS.values()
+                        for name in engines})
+
+# Algorithms a FieldCache can answer, mapped to its ``weighted`` flag
+CACHEABLE = {"BFS": False, "Bidirectional": False, "UCS": True}
+
+def make_search(grid, algorithm, backend=None, **opts):
+    """Step generator for ``algorithm`` (a name from SEARCH_GENS)."""
+    try:
+        gen = SEARCH_GENS[algorithm]
+    except KeyError:
+        raise ValueError(f"unknown algorithm {algorithm!r}; "
+                         f"choose from {', '.join(SEARCH_GENS)}") from None
+    if backend is not None:
+        try:
+            gen = SEARCH_BACKENDS[algorithm][backend]
+        except KeyError:
+            raise ValueError(f"{algorithm} has no {backend!r} backend") from None
+    return gen(grid, **opts)
+
+def path_cost(path):
+    """Sum of 1.0 / 1.4 step costs along a path of (r, c) cells."""
+    cost = 0.0
+    for (r0, c0), (r1, c1) in zip(path, path[1:]):
+        cost += 1.4 if (r0 != r1 and c0 != c1) else 1.0
+    return cost
+
+def solve(grid, algorithm, max_steps=None, backend=None, cache=None,
+          metrics=None, **opts):
+    """Run one search to completion without any GUI.
+
+    Returns a dict with the path, its cost and length, the number of
+    generator steps and expanded cells, and the wall time in seconds.
+    ``max_steps`` stops runaway searches (IDDFS on big maps); extra
+    options go to the generator (e.g. ``limit`` for DLS). ``backend``
+    picks an engine from SEARCH_BACKENDS; "wavefront" runs BFS /
+    Bidirectional as whole-level array sweeps and counts levels as steps.
+    With a FieldCache, BFS / Bidirectional / UCS are answered from cached
+    distance fields; a hit reports zero steps and expansions. A target
+    outside the start's component is rejected before any search runs;
+    ``reachable`` is the size of that component, an upper bound on the
+    cells any search can expand. A SearchMetrics passed as ``metrics``
+    collects detailed counters from the step stream. The "hierarchical"
+    UCS backend (which keeps one ClusterGraph per grid and cluster size,
+    see Grid.cluster_graph) may return longer paths; its results add ``bound``,
+    the cost over the octile lower bound, which caps that overhead.
+    The "compact" BFS / UCS backend (``max_bytes`` caps its memory) counts
+    sweeps as steps and adds its ``mode`` and ``peak_bytes`` estimate; it
+    skips the connectivity index, which would outweigh it, so its
+    ``reachable`` is None.
+    """
+    t0 = time.perf_counter()
+    steps = expanded = 0
+    path = []
+    compact = None
+    if backend == "compact" and "compact" in SEARCH_BACKENDS.get(algorithm, ()):
+        compact = compact_search(grid, CACHEABLE[algorithm], **opts)
+        path = compact["path"]
+        steps, expanded = compact["sweeps"], compact["expanded"]
+        gen = ()
+    elif not grid.connected():
+        make_search(grid, algorithm, backend, **opts)   # still reject bad names
+        gen = ()
+    elif cache is not None and algorithm in CACHEABLE:
+        path = cache.path(grid, weighted=CACHEABLE[algorithm])
+        if cache.built is not None:
+            steps, expanded = cache.built.levels, cache.built.expanded
+        gen = ()
+    elif backend == "wavefront" and "wavefront" in SEARCH_BACKENDS.get(algorithm, ()):
+        field = distance_field(grid, target=grid.target, **opts)
+        path = field.path_to(grid.target)
+        steps, expanded = field.levels, field.expanded
+        gen = ()
+    else:
+        gen = make_search(grid, algorithm, backend, **opts)
+        if metrics is not None:
+            gen = metrics.wrap(gen)
+    for step in gen:
+        steps += 1
+        expanded += len(step.explored)
+        if step.path:
+            path = step.path
+            break
+        if max_steps is not None and steps >= max_steps:
+            break
+    elapsed = time.perf_counter() - t0
+    if metrics is not None:
+        metrics.finish(path, steps, expanded, elapsed)
+    result = {
+        "algorithm": algorithm,
+        "found":     bool(path),
+        "path":      path,
+        "cost":      round(path_cost(path), 4) if path else None,
+        "length":    len(path),
+        "steps":     steps,
+        "expanded":  expanded,
+        "reachable": grid.component_size() if compact is None else None,
+        "elapsed":   elapsed,
+    }
+    if backend == "hierarchical":
+        lower = octile_bound(grid.start, grid.target)
+        result["bound"] = (result["cost"] / lower if lower else 1.0) if path else None
+    if compact is not None:
+        result["mode"] = compact["mode"]
+        result["peak_bytes"] = compact["peak_bytes"]
+    return result
+
+def _group_queries(queries):
+    """Greedy cover of queries by shared endpoints: [(cell, [query index])].
+
+    Cells shared by the most queries (as start or as target) come first,
+    and every query joins the first group that can take it.
+    """
+    ends = {}
+    for k, (s, t) in enumerate(queries):
+        ends.setdefault(s, []).append(k)
+        if t != s:
+            ends.setdefault(t, []).append(k)
+    taken = [False] * len(queries)
+    groups = []
+    for cell in sorted(ends, key=lambda c: -len(ends[c])):
+        ks = [k for k in ends[cell] if not taken[k]]
+        for k in ks:
+            taken[k] = True
+        if ks:
+            groups.append((cell, ks))
+    return groups
+
+def solve_many(grid, queries, algorithm="BFS", backend=None):
+    """Answer many (start, target) queries with one sweep per shared cell.
+
+    The grid is undirected, so queries are grouped by whichever endpoint
+    they share (see _group_queries) and each group is served by a single
+    multi-target wavefront from that cell, which stops once every other
+    endpoint in the group is settled. Endpoints in another component are
+    answered from the connectivity index without searching. ``algorithm``
+    is one of CACHEABLE (BFS / Bidirectional count steps, UCS the 1.0 /
+    1.4 costs); ``backend`` is passed to distance_field.
+
+    Returns (results, stats): per-query dicts in input order with the
+    fields of ``solve`` that make sense per query, and totals with the
+    number of sweeps, expanded cells, elapsed time and queries per second.
+    """
+    try:
+        weighted = CACHEABLE[algorithm]
+    except KeyError:
+        raise ValueError(f"solve_many supports {', '.join(CACHEABLE)}, "
+                         f"not {algorithm!r}") from None
+    queries = [(tuple(s), tuple(t)) for s, t in queries]
+    t0 = time.perf_counter()
+    results = [None] * len(queries)
+    sweeps = expanded = 0
+    for source, ks in _group_queries(queries):
+        others = {k: (queries[k][1] if queries[k][0] == source else queries[k][0])
+                  for k in ks}
+        reachable = [cell for cell in set(others.values())
+                     if grid.connected(source, cell)]
+        field = None
+        if reachable:
+            field = distance_field(grid, source, weighted, backend=backend,
+                                   targets=reachable)
+            sweeps += 1
+            expanded += field.expanded
+        for k in ks:
+            start, target = queries[k]
+            path = []
+            if field is not None and grid.connected(source, others[k]):
+                path = (field.path_to(target) if start == source
+                        else field.path_from(start))
+            results[k] = {
+                "algorithm": algorithm,
+                "start":     start,
+                "target":    target,
+                "found":     bool(path),
+                "path":      path,
+                "cost":      round(path_cost(path), 4) if path else None,
+                "length":    len(path),
+            }
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "queries":  len(queries),
+        "sweeps":   sweeps,
+        "expanded": expanded,
+        "elapsed":  elapsed,
+        "qps":      len(queries) / elapsed if elapsed else None,
+    }
+    return results, stats
+
+
+# ─────────────────────────────────────────────
+#  INSTRUMENTATION
+# ─────────────────────────────────────────────
+class SearchMetrics:
+    """Counters derived from the Step deltas of one search.
+
+    Measured on the consumer side, so every generator is covered as is,
+    and nothing is measured unless a SearchMetrics is handed to ``solve``
+    or enabled in the GUI. ``hooks`` are called as ``fn(metrics, step)``
+    after every observed step.
+
+    ``duplicates`` counts cells added while already open or expanded
+    (re-pushes, re-opens); ``stale_pops`` counts cells leaving the
+    frontier without being expanded (stale heap entries, depth cut-offs);
+    ``reexpanded`` counts expansions of a cell expanded before.
+    """
+
+    FIELDS = ("algorithm", "steps", "expanded", "generated", "duplicates",
+              "stale_pops", "reexpanded", "peak_frontier", "peak_explored",
+              "search_ms", "us_per_expansion", "path_length", "path_cost",
+              "replans", "replan_ms_mean", "replan_ms_max")
+
+    def __init__(self, algorithm=None, hooks=()):
+        self.algorithm = algorithm
+        self.hooks     = list(hooks)
+        self.frontier  = set()
+        self.explored  = set()
+        self.seen      = set()     # every cell ever expanded
+        self.steps = self.expanded = self.generated = 0
+        self.duplicates = self.stale_pops = self.reexpanded = 0
+        self.peak_frontier = self.peak_explored = 0
+        self.search_time = 0.0
+        self.path_length = 0
+        self.path_cost   = None
+        self.replan_latency = []
+
+    def observe(self, step):
+        frontier, explored, seen = self.frontier, self.explored, self.seen
+        if step.reset:
+            frontier.clear()
+            explored.clear()
+        self.steps += 1
+        if not step.path:
+            self.stale_pops += sum(1 for i in step.removed if i not in step.explored)
+        frontier.difference_update(step.removed)
+        for i in step.added:
+            if i in frontier or i in explored:
+                self.duplicates += 1
+            frontier.add(i)
+        self.generated += len(step.added)
+        for i in step.explored:
+            if i in seen:
+                self.reexpanded += 1
+            else:
+                seen.add(i)
+            explored.add(i)
+        self.expanded += len(step.explored)
+        self.peak_frontier = max(self.peak_frontier, len(frontier))
+        self.peak_explored = max(self.peak_explored, len(explored))
+        if step.path:
+            self.path_length = len(step.path)
+            self.path_cost   = round(path_cost(step.path), 4)
+        for fn in self.hooks:
+            fn(self, step)
+
+    def wrap(self, gen):
+        """Yield ``gen``'s steps, timing only the time spent inside it."""
+        it = iter(gen)
+        clock = time.perf_counter
+        while True:
+            t0 = clock()
+            try:
+                step = next(it)
+            except StopIteration:
+                return
+            self.search_time += clock() - t0
+            self.observe(step)
+            yield step
+
+    def finish(self, path, steps, expanded, elapsed):
+        """Fill in what the step stream did not show (cache / wavefront runs)."""
+        if not self.steps:
+            self.steps, self.expanded, self.search_time = steps, expanded, elapsed
+        if path:
+            self.path_length = len(path)
+            self.path_cost   = round(path_cost(path), 4)
+
+    def record_replan(self, latency):
+        self.replan_latency.append(latency)
+
+    def as_dict(self):
+        lat = self.replan_latency
+        return {
+            "algorithm":        self.algorithm,
+            "steps":            self.steps,
+            "expanded":         self.expanded,
+            "generated":        self.generated,
+            "duplicates":       self.duplicates,
+            "stale_pops":       self.stale_pops,
+            "reexpanded":       self.reexpanded,
+            "peak_frontier":    self.peak_frontier,
+            "peak_explored":    self.peak_explored,
+            "search_ms":        round(self.search_time * 1000, 3)
+                                if self.search_time else None,   # untimed in the GUI
+            "us_per_expansion": round(self.search_time * 1e6 / self.expanded, 3)
+                                if self.search_time and self.expanded else None,
+            "path_length":      self.path_length,
+            "path_cost":        self.path_cost,
+            "replans":          len(lat),
+            "replan_ms_mean":   round(sum(lat) * 1000 / len(lat), 3) if lat else None,
+            "replan_ms_max":    round(max(lat) * 1000, 3) if lat else None,
+        }
+
+
+def write_metrics(records, path):
+    """Write SearchMetrics dicts as CSV (for a .csv path) or JSON."""
+    with open(path, "w", newline="") as f:
+        if path.lower().endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=SearchMetrics.FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            json.dump(records, f, indent=2)
+
+
+# ─────────────────────────────────────────────
+#  BACKGROUND SEARCH
+# ─────────────────────────────────────────────
+class SearchStream:
+    """Steps of one search job, read on the UI side with ``poll``."""
+
+    def __init__(self, worker, job):
+        self.worker = worker
+        self.job    = job
+        self.done   = False
+
+    def poll(self, timeout=0):
+        """Next Step, or None if none is ready; StopIteration when finished."""
+        if self.done or self.worker.job != self.job:
+            raise StopIteration
+        results = self.worker.results
+        while True:
+            try:
+                if timeout:
+                    job, step = results.get(timeout=timeout)
+                else:
+                    job, step = results.get_nowait()
+            except queue.Empty:
+                return None
+            if job == self.job:        # anything else is from a cancelled job
+                break
+        if step is None:
+            self.done = True
+            raise StopIteration
+        return step
+
+
+class SearchWorker:
+    """Runs searches in a background thread on a private replica of a grid.
+
+    The replica is copied once; afterwards the worker observes the grid and
+    journals every change as (cell id, kind). ``start`` commits the journal
+    with the search request, and the thread replays it onto the replica
+    (O(changed cells)) before searching, so a search only ever sees one
+    fixed grid version while the UI keeps editing. A newer commit cancels
+    the running search. Steps come back through a bounded queue. While
+    idle (before the first ``start`` and after ``cancel``) there is no
+    search to shield, so changes go to the thread at once, not to the journal.
+    """
+
+    def __init__(self, grid, backlog=4096):
+        self.grid    = grid
+        self.replica = Grid(grid.rows, grid.cols)
+        self.replica.cells[:] = grid.cells
+        self.journal  = []
+        self.job      = 0
+        self.idle     = True
+        self.requests = queue.Queue()
+        self.results  = queue.Queue(maxsize=backlog)
+        grid.add_observer(self._on_change)
+        self.thread = threading.Thread(target=self._run, name="search-worker",
+                                       daemon=True)
+        self.thread.start()
+
+    def _on_change(self, i, old, new):
+        if self.idle:
+            self.requests.put((self.job, ((i, new),), self.grid.start,
+                               self.grid.target, None, None))
+        else:
+            self.journal.append((i, new))
+
+    def _commit(self, algorithm, opts):
+        self.idle = algorithm is None
+        self.job += 1
+        self.requests.put((self.job, self.journal, self.grid.start,
+                           self.grid.target, algorithm, opts))
+        self.journal = []
+
+    def start(self, algorithm, **opts):
+        """Search the grid as it is now; returns its SearchStream."""
+        self._commit(algorithm, opts)
+        return SearchStream(self, self.job)
+
+    def cancel(self):
+        """Stop the running search (pending grid changes still sync) and
+        go idle; call it whenever the UI is done with a stream."""
+        self._commit(None, None)
+
+    def close(self):
+        self.grid.remove_observer(self._on_change)
+        self.requests.put(None)
+        self.thread.join()
+
+    def _emit(self, job, step):
+        """Queue one result; False once a newer request is waiting."""
+        while True:
+            try:
+                self.results.put((job, step), timeout=0.05)
+                return True
+            except queue.Full:
+                if not self.requests.empty():
+                    return False
+
+    def _run(self):
+        replica = self.replica
+        while True:
+            req = self.requests.get()
+            if req is None:
+                return
+            job, journal, start, target, algorithm, opts = req
+            for i, kind in journal:
+                replica.set_cell(i, kind)
+            replica.start, replica.target = start, target
+            if algorithm is None or not self.requests.empty():
+                continue                # superseded before it started
+            for step in make_search(replica, algorithm, **opts):
+                if not self.requests.empty() or not self._emit(job, step):
+                    break
+            else:
+                self._emit(job, None)
 
 
 # ─────────────────────────────────────────────
@@ -373,7 +3001,8 @@ class Button:
 #  MAIN APP
 # ─────────────────────────────────────────────
 class App:
-    def __init__(self):
+    def __init__(self, seed=None):
+        _load_pygame()
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_W, WINDOW_H))
         pygame.display.set_caption("GOOD PERFORMANCE TIME APP")
@@ -386,21 +3015,35 @@ class App:
         self.font_xl  = pygame.font.SysFont("consolas", 28, bold=True)
         self.font_ti  = pygame.font.SysFont("consolas", 20, bold=True)
 
-        self.grid = Grid(GRID_ROWS, GRID_COLS)
+        self.grid = Grid(GRID_ROWS, GRID_COLS,
+                         rng=random.Random(seed) if seed is not None else None)
         self.grid.random_walls()
+        self.grid.add_observer(self._on_grid_change)
+
+        # Dirty-region rendering state
+        self.cell_colors  = [None] * (GRID_ROWS * GRID_COLS)
+        self.dirty        = set()
+        self.full_redraw  = True
+        self.overlays     = []     # rects drawn over the grid last frame
 
         # State
         self.state   = "menu"   # menu | running | paused | done
         self.alg_idx = 0
-        self.gen     = None
-        self.frontier  = set()
-        self.explored  = set()
-        self.path      = []
+        self.gen     = None      # SearchStream of the running search
+        self.worker  = SearchWorker(self.grid)
+        self.replanner = None
+        self.watch     = 0       # steps left in a repaired UCS run
+        self.search    = SearchState(self.grid)
         self.last_step = 0
+        self.step_credit  = 0.0
+        self.speed_idx    = 0
+        self.fast_forward = False  # run to completion, budget per frame
         self.step_count = 0
         self.replanned  = 0
         self.message    = ""
         self.msg_timer  = 0
+        self.metrics    = None   # SearchMetrics while the overlay is on
+        self.show_metrics = False
         self.draw_mode  = None   # None | 'wall' | 'erase'
 
         self._build_ui()
@@ -437,37 +3080,105 @@ class App:
         y = GRID_OFFSET_Y + r * CELL
         return pygame.Rect(x, y, CELL-1, CELL-1)
 
-    def draw_grid(self):
-        for r in range(GRID_ROWS):
-            for c in range(GRID_COLS):
-                rect = self._cell_rect(r, c)
-                pos  = (r, c)
-
-                if pos == self.grid.start:
-                    col = START_C
-                elif pos == self.grid.target:
-                    col = TARGET_C
-                elif pos in self.grid.walls:
-                    col = WALL_C
-                elif pos in self.grid.dyn_walls:
-                    col = DYN_WALL_C
-                elif pos in self.path:
-                    col = PATH_C
-                elif pos in self.frontier:
-                    col = FRONTIER_C
-                elif pos in self.explored:
-                    col = EXPLORED_C
-                else:
-                    col = EMPTY_C
-
-                pygame.draw.rect(self.screen, col, rect, border_radius=3)
-
-        # Grid border
+    # The grid is repainted incrementally: cell_colors remembers what each
+    # cell shows, search steps / wall edits / overlays add ids to `dirty`,
+    # and draw_grid() only repaints (and returns rects for) changed cells.
+    def _cell_color(self, i):
+        cell = self.grid.cells[i]
+        if i == self.grid.start_id:
+            return START_C
+        if i == self.grid.target_id:
+            return TARGET_C
+        if cell == WALL:
+            return WALL_C
+        if cell == DYN_WALL:
+            return DYN_WALL_C
+        if i in self.search.path_ids:
+            return PATH_C
+        if i in self.search.frontier:
+            return FRONTIER_C
+        if i in self.search.explored:
+            return EXPLORED_C
+        return EMPTY_C
+
+    def _on_grid_change(self, i, old, new):
+        self.dirty.add(i)
+
+    def _mark_search_dirty(self):
+        """Dirty every cell the current search has coloured."""
+        self.dirty.update(self.search.frontier)
+        self.dirty.update(self.search.explored)
+        self.dirty.update(self.search.path_ids)
+
+    def _set_path(self, path):
+        self.dirty.update(self.search.path_ids)
+        self.search.set_path(path)
+        self.dirty.update(self.search.path_ids)
+
+    def _apply_step(self, step):
+        if step.reset:
+            self._mark_search_dirty()
+        self.dirty.update(step.removed)
+        self.dirty.update(step.added)
+        self.dirty.update(step.explored)
+        self.search.apply(step)
+        self.dirty.update(self.search.path_ids)
+        return step
+
+    def _clear_overlay(self, rect):
+        """Wipe an overlay rect and force a repaint of the cells below it."""
+        self.screen.fill(BG, rect)
+        self.screen.set_clip(rect)
+        pygame.draw.rect(self.screen, ACCENT, self._grid_border_rect(), 2, border_radius=4)
+        self.screen.set_clip(None)
+        c0 = max(0, (rect.left - GRID_OFFSET_X) // CELL)
+        c1 = min(GRID_COLS - 1, (rect.right - GRID_OFFSET_X) // CELL)
+        r0 = max(0, (rect.top - GRID_OFFSET_Y) // CELL)
+        r1 = min(GRID_ROWS - 1, (rect.bottom - GRID_OFFSET_Y) // CELL)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                i = r * GRID_COLS + c
+                self.dirty.add(i)
+                self.cell_colors[i] = None
+
+    def _grid_border_rect(self):
         bx = GRID_OFFSET_X - 2
         by = GRID_OFFSET_Y - 2
         bw = GRID_COLS * CELL + 2
         bh = GRID_ROWS * CELL + 2
-        pygame.draw.rect(self.screen, ACCENT, (bx, by, bw, bh), 2, border_radius=4)
+        return pygame.Rect(bx, by, bw, bh)
+
+    def draw_grid(self):
+        """Repaint dirty cells; returns the screen rects that changed."""
+        if self.full_redraw:
+            self.full_redraw = False
+            self.screen.fill(BG)
+            self.cell_colors = [None] * (GRID_ROWS * GRID_COLS)
+            ids = range(GRID_ROWS * GRID_COLS)
+        else:
+            ids = self.dirty
+        border = self._grid_border_rect()
+        rects = []
+        for i in ids:
+            col = self._cell_color(i)
+            if col == self.cell_colors[i]:
+                continue
+            self.cell_colors[i] = col
+            r, c = divmod(i, GRID_COLS)
+            rect = self._cell_rect(r, c)
+            self.screen.fill(BG, rect)
+            pygame.draw.rect(self.screen, col, rect, border_radius=3)
+            if r in (0, GRID_ROWS-1) or c in (0, GRID_COLS-1):
+                # Cells along the edge share pixels with the grid border
+                self.screen.set_clip(rect)
+                pygame.draw.rect(self.screen, ACCENT, border, 2, border_radius=4)
+                self.screen.set_clip(None)
+            rects.append(rect)
+        self.dirty = set()
+        if isinstance(ids, range):
+            pygame.draw.rect(self.screen, ACCENT, border, 2, border_radius=4)
+            rects = [self.screen.get_rect()]
+        return rects
 
     def draw_panel(self):
         # Panel background
@@ -511,6 +3222,7 @@ class App:
             (PATH_C,     "Path"),
         ]
         lx, ly = GRID_OFFSET_X, GRID_OFFSET_Y + GRID_ROWS * CELL + 12
+        self.screen.fill(BG, self._legend_rect())
         for col, label in legend:
             pygame.draw.rect(self.screen, col, (lx, ly, 16, 16), border_radius=3)
             lbl = self.font_sm.render(label, True, TEXT_C)
@@ -520,6 +3232,16 @@ class App:
                 lx = GRID_OFFSET_X
                 ly += 22
 
+    def _legend_rect(self):
+        top = GRID_OFFSET_Y + GRID_ROWS * CELL + 2
+        return pygame.Rect(0, top, PANEL_X, WINDOW_H - top)
+
+    def _static_rects(self):
+        """Header, panel and legend - redrawn every frame, fixed size."""
+        return [pygame.Rect(0, 0, WINDOW_W, 90),
+                pygame.Rect(PANEL_X, 0, WINDOW_W - PANEL_X, WINDOW_H),
+                self._legend_rect()]
+
     def draw_header(self):
         # Header bar
         pygame.draw.rect(self.screen, (12, 12, 24), (0, 0, WINDOW_W, 88))
@@ -529,15 +3251,18 @@ class App:
         self.screen.blit(title, (20, 10))
 
         alg = ALGORITHMS[self.alg_idx]
-        sub = self.font_ti.render(f"Algorithm: {alg}  |  State: {self.state.upper()}",
-                                  True, ALG_COLORS[alg])
+        speed = "MAX" if self.fast_forward else f"{SPEEDS[self.speed_idx]}x"
+        sub = self.font_ti.render(f"Algorithm: {alg}  |  State: {self.state.upper()}"
+                                  f"  |  Speed: {speed}", True, ALG_COLORS[alg])
         self.screen.blit(sub, (20, 46))
 
-        tip = self.font_sm.render("LMB: place wall   RMB: erase wall   Drag on grid",
+        tip = self.font_sm.render("LMB: place wall   RMB: erase wall   Drag on grid"
+                                  "   +/-: speed   F: finish   M: metrics",
                                   True, (120, 120, 160))
         self.screen.blit(tip, (20, 70))
 
     def draw_message(self):
+        """Blit the pop-up message; returns the rect it covers (or None)."""
         if self.message and time.time() < self.msg_timer:
             surf = self.font_md.render(self.message, True, WARN_C)
             x = GRID_OFFSET_X + (GRID_COLS * CELL - surf.get_width()) // 2
@@ -546,6 +3271,45 @@ class App:
             bg.fill((0, 0, 0, 180))
             self.screen.blit(bg, (x-10, y-5))
             self.screen.blit(surf, (x, y))
+            return pygame.Rect(x-10, y-5, bg.get_width(), bg.get_height())
+        return None
+
+    def toggle_metrics(self):
+        """Live metrics overlay; counting starts with the current step."""
+        self.show_metrics = not self.show_metrics
+        self.metrics = (SearchMetrics(ALGORITHMS[self.alg_idx])
+                        if self.show_metrics else None)
+
+    def draw_metrics(self):
+        """Blit the metrics overlay; returns the rect it covers (or None)."""
+        if self.metrics is None:
+            return None
+        m = self.metrics.as_dict()
+        cost = f"{m['path_cost']:.1f}" if m["path_cost"] is not None else "-"
+        lines = [
+            f"expanded    {m['expanded']}",
+            f"generated   {m['generated']}",
+            f"duplicates  {m['duplicates']}",
+            f"stale pops  {m['stale_pops']}",
+            f"re-expanded {m['reexpanded']}",
+            f"peak open   {m['peak_frontier']}",
+            f"peak closed {m['peak_explored']}",
+            f"path        {m['path_length']} cells, cost {cost}",
+        ]
+        if m["replans"]:
+            lines.append(f"replans     {m['replans']}, max {m['replan_ms_max']:.1f} ms")
+        surfs = [self.font_sm.render(ln, True, INFO_C) for ln in lines]
+        w = max(s.get_width() for s in surfs) + 16
+        h = sum(s.get_height() for s in surfs) + 12
+        x, y = GRID_OFFSET_X + 6, GRID_OFFSET_Y + 6
+        bg = pygame.Surface((w, h), pygame.SRCALPHA)
+        bg.fill((0, 0, 0, 190))
+        self.screen.blit(bg, (x, y))
+        ty = y + 6
+        for surf in surfs:
+            self.screen.blit(surf, (x + 8, ty))
+            ty += surf.get_height()
+        return pygame.Rect(x, y, w, h)
 
     def show_message(self, msg, duration=2.5):
         self.message   = msg
@@ -553,59 +3317,169 @@ class App:
 
     # ── ALGORITHM RUNNER ──────────────────────
     def start_algorithm(self):
-        self.frontier   = set()
-        self.explored   = set()
-        self.path       = []
+        self._mark_search_dirty()
+        self.search.clear()
         self.step_count = 0
         self.replanned  = 0
+        self.watch      = 0
         self.last_step  = time.time()
+        self.step_credit = 0.0
         alg = ALGORITHMS[self.alg_idx]
-
-        if alg == "BFS":
-            self.gen = bfs_gen(self.grid)
-        elif alg == "DFS":
-            self.gen = dfs_gen(self.grid)
-        elif alg == "UCS":
-            self.gen = ucs_gen(self.grid)
-        elif alg == "DLS":
-            self.gen = dls_gen(self.grid, DLS_LIMIT)
-        elif alg == "IDDFS":
-            self.gen = iddfs_gen(self.grid)
-        elif alg == "Bidirectional":
-            self.gen = bidirectional_gen(self.grid)
+        if alg != "UCS":
+            self._drop_replanner()      # it would repair this run with UCS paths
+        if not self.grid.connected():
+            self.gen   = None
+            self.worker.cancel()
+            self.state = "done"
+            self.show_message("✘ No path found! Target is walled off.")
+            return
+        self.gen = self.worker.start(alg)
+        if self.show_metrics:
+            self.metrics = SearchMetrics(alg)
+        if alg == "UCS":
+            if self.replanner is None:
+                self.replanner = IncrementalUCS(self.grid)
+            self.replanner.compute()    # seed / catch up, so repairs stay local
 
         self.state = "running"
 
-    def step_algorithm(self):
+    def step_algorithm(self, timeout=0):
+        """Apply the next streamed step; False if the worker has none yet."""
         if self.gen is None:
-            return
+            return self.watch_step() if self.watch else False
         try:
-            frontier, explored, path = next(self.gen)
-            self.frontier   = frontier
-            self.explored   = explored
+            step = self.gen.poll(timeout)
+            if step is None:
+                return False
+            path = self._apply_step(step).path
             self.step_count += 1
+            if self.metrics is not None:
+                self.metrics.observe(step)
 
             # Dynamic obstacle
-            if random.random() < DYN_PROB:
+            if self.grid.rng.random() < DYN_PROB:
                 blocked = self.grid.spawn_dynamic(
-                    current_path=self.path if self.path else None)
+                    current_path=self.search.path if self.search.path else None)
                 if blocked:
                     self.replanned += 1
+                    if self.replanner is not None:
+                        self.repair_path()
+                        return True
                     self.show_message(f"⚠ Dynamic obstacle! Re-planning... #{self.replanned}")
                     self.start_algorithm()
-                    return
+                    return True
 
             if path:
-                self.path  = path
-                self.state = "done"
-                self.gen   = None
+                self.gen = None
+                self.worker.cancel()
                 self.show_message(f"✔ Path found! Length: {len(path)}  Steps: {self.step_count}")
+                if self.replanner is None:
+                    self.state = "done"
+                elif any(self.grid.is_blocked(r, c) for r, c in path):
+                    self.replanned += 1         # spawned after the worker's snapshot
+                    self.repair_path()
+                else:
+                    self.watch = REPAIR_WATCH   # keep spawning; repairs are incremental
 
         except StopIteration:
             self.state = "done"
             self.gen   = None
-            if not self.path:
+            self.worker.cancel()
+            if not self.search.path:
                 self.show_message("✘ No path found!")
+        return True
+
+    def advance(self):
+        """Run as many steps as are due, within STEP_BUDGET of this frame.
+
+        At speed k the search owes k steps per STEP_DELAY (never more than
+        one interval's worth, so a pause does not bank a burst);
+        fast-forward owes every remaining step. Drawing only samples the
+        state afterwards, so the UI stays responsive at any speed.
+        """
+        now = time.time()
+        due = None
+        if not self.fast_forward:
+            speed = SPEEDS[self.speed_idx]
+            self.step_credit = min(self.step_credit + (now - self.last_step)
+                                   / STEP_DELAY * speed, max(speed, 1))
+            self.last_step = now
+            due = int(self.step_credit)
+            if not due:
+                return
+        deadline = time.perf_counter() + STEP_BUDGET
+        done = 0
+        while self.state == "running" and (due is None or done < due):
+            if not self.step_algorithm():
+                break           # the worker has not caught up yet
+            done += 1
+            if time.perf_counter() >= deadline:
+                break
+        if due is not None:
+            self.step_credit -= done
+        if self.state != "running":
+            self.fast_forward = False
+
+    def set_speed(self, delta):
+        self.fast_forward = False
+        self.speed_idx = min(max(self.speed_idx + delta, 0), len(SPEEDS) - 1)
+        self.last_step = time.time()
+
+    def finish(self):
+        """Fast-forward the current search (starting one if needed)."""
+        if self.state in ("menu", "done"):
+            self.start_algorithm()
+        elif self.state == "paused":
+            self.state = "running"
+            self.btn_pause.text = "⏸  PAUSE"
+        if self.state == "running":
+            self.fast_forward = True
+
+    def repair_path(self):
+        """Fix the UCS path in place instead of restarting the search.
+
+        The streamed search (if any) is dropped; the run stays alive for
+        another REPAIR_WATCH steps, during which obstacles keep spawning and
+        each one that blocks the path is repaired from the same g-values.
+        """
+        path = self.replanner.compute()
+        ev = self.replanner.last
+        self._set_path(path)
+        if self.metrics is not None:
+            self.metrics.record_replan(ev["latency"])
+            self.metrics.path_length = len(path)
+            self.metrics.path_cost = round(path_cost(path), 4) if path else None
+        if self.gen is not None:
+            self.gen = None
+            self.worker.cancel()
+        if path:
+            self.watch = REPAIR_WATCH
+            self.show_message(f"⚠ Obstacle #{self.replanned}: repaired in "
+                              f"{ev['latency']*1000:.1f} ms, {ev['expanded']} re-expanded")
+        else:
+            self.watch = 0
+            self.state = "done"
+            self.show_message("✘ No path found!")
+
+    def watch_step(self):
+        """One step of a repaired UCS run: maybe spawn an obstacle, and
+        repair the path if it lands on it."""
+        self.step_count += 1
+        self.watch -= 1
+        if (self.grid.rng.random() < DYN_PROB and
+                self.grid.spawn_dynamic(current_path=self.search.path)):
+            self.replanned += 1
+            self.repair_path()
+        elif not self.watch:
+            self.state = "done"
+            self.show_message(f"✔ Path held through {self.replanned} repairs. "
+                              f"Length: {len(self.search.path)}")
+        return True
+
+    def _drop_replanner(self):
+        if self.replanner is not None:
+            self.replanner.close()
+            self.replanner = None
 
     # ── EVENT HANDLING ────────────────────────
     def handle_events(self):
@@ -616,6 +3490,8 @@ class App:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.full_redraw = True
 
             # Keyboard shortcuts
             if event.type == pygame.KEYDOWN:
@@ -631,7 +3507,15 @@ class App:
                 if event.key == pygame.K_n:
                     self._do_new_maze()
                 if event.key == pygame.K_RIGHT and self.state == "paused":
-                    self.step_algorithm()
+                    self.step_algorithm(timeout=0.2)
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.set_speed(+1)
+                if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.set_speed(-1)
+                if event.key in (pygame.K_f, pygame.K_END):
+                    self.finish()
+                if event.key == pygame.K_m:
+                    self.toggle_metrics()
                 # Algo hotkeys 1-6
                 for i in range(len(ALGORITHMS)):
                     if event.key == getattr(pygame, f"K_{i+1}", None):
@@ -644,16 +3528,19 @@ class App:
                         self.draw_mode = 'wall'
                     elif event.button == 3:
                         self.draw_mode = 'erase'
-                if self.draw_mode and self.state in ("menu","done","paused"):
+                if self.draw_mode:
                     r, c = self._grid_pos(mouse)
                     if r is not None:
                         if (r,c) not in (self.grid.start, self.grid.target):
+                            version = self.grid.version
                             if self.draw_mode == 'wall':
                                 self.grid.walls.add((r,c))
                                 self.grid.dyn_walls.discard((r,c))
                             else:
                                 self.grid.walls.discard((r,c))
                                 self.grid.dyn_walls.discard((r,c))
+                            if self.grid.version != version:
+                                self._restart_on_edit()
 
             if event.type == pygame.MOUSEBUTTONUP:
                 self.draw_mode = None
@@ -689,7 +3576,15 @@ class App:
                     self.state = "paused"
                     self.btn_pause.text = "▶  RESUME"
                 if self.state == "paused":
-                    self.step_algorithm()
+                    self.step_algorithm(timeout=0.2)
+
+    def _restart_on_edit(self):
+        """A live search is on an older grid version: search again."""
+        if self.state in ("running", "paused"):
+            paused = self.state == "paused"
+            self.start_algorithm()
+            if paused and self.state == "running":
+                self.state = "paused"
 
     def _grid_pos(self, mouse):
         mx, my = mouse
@@ -700,18 +3595,21 @@ class App:
         return None, None
 
     def _do_reset(self):
-        self.frontier   = set()
-        self.explored   = set()
-        self.path       = []
+        self._mark_search_dirty()
+        self.search.clear()
         self.step_count = 0
         self.replanned  = 0
+        self.watch      = 0
         self.gen        = None
+        self.worker.cancel()
+        self.fast_forward = False
         self.grid.dyn_walls.clear()
         self.state       = "menu"
         self.btn_pause.text = "⏸  PAUSE"
 
     def _do_new_maze(self):
         self._do_reset()
+        self._drop_replanner()          # nothing of its search carries over
         self.grid.random_walls()
 
     # ── MAIN LOOP ─────────────────────────────
@@ -722,32 +3620,207 @@ class App:
 
             # Auto-step
             if self.state == "running":
-                now = time.time()
-                if now - self.last_step >= STEP_DELAY:
-                    self.step_algorithm()
-                    self.last_step = now
-
-            # Draw
-            self.screen.fill(BG)
-            self.draw_grid()
-            self.draw_panel()
-            self.draw_header()
-            self.draw_message()
-
-            # "Press SPACE to start" hint
-            if self.state == "menu":
-                hint = self.font_md.render(
-                    "Select an algorithm → Press START or SPACE",
-                    True, (160, 160, 200))
-                hx = GRID_OFFSET_X + (GRID_COLS*CELL - hint.get_width())//2
-                hy = GRID_OFFSET_Y + GRID_ROWS*CELL//2 - 10
-                self.screen.blit(hint, (hx, hy))
-
-            pygame.display.flip()
+                self.advance()
+
+            self.draw_frame()
+
+    def draw_frame(self):
+        """Draw - only dirty cells, the fixed panels and overlays."""
+        for rect in self.overlays:
+            self._clear_overlay(rect)
+        rects = self.draw_grid()
+        self.draw_panel()
+        self.draw_header()
+        rects += self._static_rects()
+        self.overlays = []
+        for rect in (self.draw_metrics(), self.draw_message()):
+            if rect:
+                self.overlays.append(rect)
+
+        # "Press SPACE to start" hint
+        if self.state == "menu":
+            hint = self.font_md.render(
+                "Select an algorithm → Press START or SPACE",
+                True, (160, 160, 200))
+            hx = GRID_OFFSET_X + (GRID_COLS*CELL - hint.get_width())//2
+            hy = GRID_OFFSET_Y + GRID_ROWS*CELL//2 - 10
+            self.screen.blit(hint, (hx, hy))
+            self.overlays.append(hint.get_rect(topleft=(hx, hy)))
+
+        rects += self.overlays
+        pygame.display.update(rects)
 
 
 # ─────────────────────────────────────────────
 #  ENTRY POINT
 # ─────────────────────────────────────────────
+def _parse_cell(text):
+    r, c = text.split(",")
+    return int(r), int(c)
+
+def _parse_size(text):
+    rows, cols = text.lower().split("x")
+    return int(rows), int(cols)
+
+def build_parser():
+    p = argparse.ArgumentParser(
+        description="AI Pathfinder. Without --map / --random the pygame GUI starts.")
+    p.add_argument("--map", help="text map file of '.', '#', 'S' and 'T', "
+                                 "or a MovingAI .map / .pfm / .pfb map")
+    p.add_argument("--random", type=_parse_size, metavar="ROWSxCOLS",
+                   help="solve a random maze of this size instead of a map")
+    p.add_argument("--density", type=float, default=0.22,
+                   help="wall density for --random (default 0.22)")
+    p.add_argument("--maze", metavar="KIND",
+                   help="build --random with a mazes.py generator instead: uniform "
+                        "(at --density), division, caves or rooms; start and "
+                        "target are always connected")
+    p.add_argument("--seed", type=int,
+                   help="random seed for --random (or the GUI's mazes and obstacles)")
+    p.add_argument("-a", "--algorithm", action="append",
+                   choices=list(SEARCH_GENS) + ["all"],
+                   help="algorithm to run; repeatable (default: all)")
+    p.add_argument("--start", type=_parse_cell, metavar="R,C")
+    p.add_argument("--target", type=_parse_cell, metavar="R,C")
+    p.add_argument("--limit", type=int, default=DLS_LIMIT,
+                   help=f"DLS depth limit (default {DLS_LIMIT})")
+    p.add_argument("--max-steps", type=int, help="give up after this many steps")
+    p.add_argument("--backend", choices=BACKEND_NAMES,
+                   help="alternative engine where the algorithm has one: "
+                        "wavefront (BFS / Bidirectional, NumPy when installed), "
+                        "bidirectional / bucket / hierarchical (UCS), "
+                        "jump (UCS, fewer expansions but not faster), "
+                        "compact (BFS / UCS, memory-bounded)")
+    p.add_argument("--cluster-size", type=int, default=CLUSTER_SIZE,
+                   help=f"cluster side for --backend hierarchical (default {CLUSTER_SIZE})")
+    p.add_argument("--max-mb", type=int, default=COMPACT_MAX_BYTES >> 20, metavar="MB",
+                   help="memory cap for --backend compact; past it the search "
+                        f"degrades to frontier search (default {COMPACT_MAX_BYTES >> 20})")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    p.add_argument("--show-path", action="store_true",
+                   help="include the path cells in the text output")
+    p.add_argument("--metrics", metavar="FILE",
+                   help="write per-algorithm search metrics (.csv or .json)")
+    p.add_argument("--queries", type=int, metavar="N",
+                   help="answer N random start/target pairs with solve_many "
+                        "and compare its throughput with one-at-a-time solve")
+    p.add_argument("--sources", type=int, default=8, metavar="K",
+                   help="distinct start cells the --queries pairs share (default 8)")
+    return p
+
+def _random_queries(grid, n, sources, rng):
+    """n (start, target) pairs whose starts come from ``sources`` free cells."""
+    cell = lambda: grid.cell(grid.random_free_cell(rng))
+    starts = [cell() for _ in range(max(sources, 1))]
+    return [(rng.choice(starts), cell()) for _ in range(n)]
+
+def run_queries(grid, names, n, sources, seed=None, baseline=50):
+    """Time solve_many against solve on up to ``baseline`` of the same pairs."""
+    if grid.random_free_cell() is None:
+        raise SystemExit("no free cells to draw queries from")
+    queries = _random_queries(grid, n, sources, random.Random(seed))
+    default_start, default_target = grid.start, grid.target
+    rows = []
+    try:
+        for name in names:
+            if name not in CACHEABLE:
+                continue
+            results, stats = solve_many(grid, queries, name)
+            sample = queries[:baseline]
+            t0 = time.perf_counter()
+            for start, target in sample:
+                grid.start, grid.target = start, target
+                solve(grid, name)
+            single = len(sample) / (time.perf_counter() - t0)
+            stats.update(algorithm=name, found=sum(r["found"] for r in results),
+                         baseline_qps=single, speedup=stats["qps"] / single)
+            rows.append(stats)
+    finally:
+        grid.start, grid.target = default_start, default_target
+    return rows
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.map is None and args.random is None:
+        App(args.seed).run()
+        return 0
+
+    if args.map is not None:
+        grid = load_map(args.map)
+    elif args.maze:
+        from mazes import generate      # mazes imports this module
+        params = {"density": args.density} if args.maze == "uniform" else {}
+        try:
+            grid = generate(args.maze, *args.random, seed=args.seed,
+                            connected=True, **params)
+        except ValueError as exc:
+            raise SystemExit(f"--maze: {exc}")
+    else:
+        grid = Grid(*args.random,
+                    rng=random.Random(args.seed) if args.seed is not None else None)
+        grid.random_walls(args.density)
+    for flag, cell in (("start", args.start), ("target", args.target)):
+        if cell is None:
+            continue
+        if not grid.in_bounds(*cell):
+            raise SystemExit(f"--{flag} {cell[0]},{cell[1]} is outside the "
+                             f"{grid.rows}x{grid.cols} grid")
+        if grid.is_blocked(*cell):
+            raise SystemExit(f"--{flag} {cell[0]},{cell[1]} is a wall")
+        setattr(grid, flag, cell)
+
+    names = args.algorithm or ["all"]
+    if "all" in names:
+        names = ALGORITHMS
+    if args.queries:
+        rows = run_queries(grid, names, args.queries, args.sources, args.seed)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return 0
+        print(f"{'Algorithm':<14}{'Queries':>8}{'Found':>7}{'Sweeps':>8}"
+              f"{'Expanded':>10}{'q/s':>10}{'1-by-1':>9}{'Speedup':>9}")
+        for row in rows:
+            print(f"{row['algorithm']:<14}{row['queries']:>8}{row['found']:>7}"
+                  f"{row['sweeps']:>8}{row['expanded']:>10}{row['qps']:>10.1f}"
+                  f"{row['baseline_qps']:>9.1f}{row['speedup']:>8.1f}x")
+        return 0
+    results = []
+    records = []
+    for name in names:
+        opts = {"limit": args.limit} if name == "DLS" else {}
+        backend = args.backend if args.backend in SEARCH_BACKENDS.get(name, ()) else None
+        if backend == "hierarchical":
+            opts["size"] = args.cluster_size
+        elif backend == "compact":
+            opts["max_bytes"] = args.max_mb << 20
+        metrics = SearchMetrics(name) if args.metrics else None
+        results.append(solve(grid, name, max_steps=args.max_steps,
+                             backend=backend, metrics=metrics, **opts))
+        if metrics is not None:
+            records.append(metrics.as_dict())
+    if args.metrics:
+        write_metrics(records, args.metrics)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'Algorithm':<14}{'Found':>6}{'Cost':>9}{'Length':>8}"
+          f"{'Steps':>9}{'Expanded':>10}{'ms':>10}")
+    for res in results:
+        cost = f"{res['cost']:.1f}" if res["found"] else "-"
+        print(f"{res['algorithm']:<14}{'yes' if res['found'] else 'no':>6}{cost:>9}"
+              f"{res['length']:>8}{res['steps']:>9}{res['expanded']:>10}"
+              f"{res['elapsed']*1000:>10.2f}")
+        if res.get("bound"):
+            print(f"    within x{res['bound']:.3f} of the octile lower bound")
+        if res.get("mode"):
+            peak = res["peak_bytes"]
+            size = f"{peak / 2**20:.1f} MB" if peak >= 2**20 else f"{peak / 1024:.0f} KB"
+            print(f"    {res['mode']} mode, ~{size} peak")
+        if args.show_path and res["found"]:
+            print("    " + " ".join(f"{r},{c}" for r, c in res["path"]))
+    return 0
+
+
 if __name__ == "__main__":
-    App().run()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,524 @@
+"""
+AI Pathfinder - Search Traces
+Records a search as a compact binary trace and replays it without running
+the algorithm again. A trace holds the seed, the initial grid and one
+varint-encoded event per search step (pushed / popped / expanded cells) or
+occupancy change (dynamic obstacles), plus periodic keyframes of the whole
+search state. Readers mmap the file and reach any step by bisecting the
+keyframe index and replaying at most one keyframe interval of events.
+
+    python searchtrace.py record --random 60x60 --seed 3 -a BFS --dyn 0.02 -o bfs.pft
+    python searchtrace.py info bfs.pft
+    python searchtrace.py show bfs.pft --step 250
+    python searchtrace.py replay bfs.pft
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from bisect import bisect_right
+
+from pathfinder import (ALGORITHMS, DLS_LIMIT, DYN_WALL, WALL, Grid, SearchState,
+                        Step, load_map, make_search)
+
+MAGIC   = b"PFTRACE1"
+VERSION = 1
+
+# Event tags (low two bits); step flags live in the bits above
+EV_STEP, EV_CELL, EV_KEYFRAME, EV_END = 0, 1, 2, 3
+F_RESET, F_PATH, F_SAME = 1, 2, 4     # F_SAME: explored == removed
+
+
+# ─────────────────────────────────────────────
+#  VARINTS
+# ─────────────────────────────────────────────
+def _put(out, n):
+    """Append unsigned varint ``n`` to bytearray ``out``."""
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _get(buf, pos):
+    """Unsigned varint at ``pos``; returns (value, next pos)."""
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+# ─────────────────────────────────────────────
+#  WRITER
+# ─────────────────────────────────────────────
+class TraceWriter:
+    """Streams a search trace to ``path``; use as a context manager.
+
+    Feed every Step to ``step``; occupancy changes are picked up by
+    observing the grid. Cell ids are written as zig-zag deltas from the
+    previous id (neighbouring cells cost a byte or two), restarting from 0
+    at each keyframe so a reader can begin decoding there. A keyframe is
+    written every ``keyframe_every`` steps, so a seek never replays more
+    than that many steps; raise it to trade seek time for file size.
+    """
+
+    def __init__(self, path, grid, algorithm, seed=None, keyframe_every=1024):
+        self.f = open(path, "wb")
+        self.grid  = grid
+        self.every = keyframe_every
+        self.state = SearchState(grid)
+        self.initial = bytes(grid.cells)
+        self.changed = {}           # cell id -> kind, where it differs from initial
+        self.steps = 0
+        self.index = []             # (step, file offset) per keyframe
+        self.pos   = 0
+        self.buf   = bytearray()
+        self.prev  = 0
+
+        head = bytearray(MAGIC)
+        for n in (VERSION, grid.rows, grid.cols, grid.start_id, grid.target_id,
+                  0 if seed is None else seed + 1):
+            _put(head, n)
+        name = algorithm.encode()
+        _put(head, len(name))
+        head += name
+        head += self.initial
+        self._write(head)
+        self._keyframe()
+        grid.add_observer(self._on_change)
+
+    def _write(self, data):
+        self.buf += data
+        self.pos += len(data)
+        if len(self.buf) >= 1 << 16:
+            self.f.write(self.buf)
+            self.buf.clear()
+
+    def _ids(self, out, ids):
+        _put(out, len(ids))
+        prev = self.prev
+        for i in ids:
+            _put(out, _zigzag(i - prev))
+            prev = i
+        self.prev = prev
+
+    def step(self, step):
+        flags = (F_RESET if step.reset else 0) | (F_PATH if step.path else 0)
+        same = list(step.explored) == list(step.removed)
+        if same:
+            flags |= F_SAME
+        out = bytearray([EV_STEP | flags << 2])
+        self._ids(out, step.added)
+        self._ids(out, step.removed)
+        if not same:
+            self._ids(out, step.explored)
+        if step.path:
+            cols = self.grid.cols
+            self._ids(out, [r*cols + c for r, c in step.path])
+        self._write(out)
+        self.state.apply(step)
+        self.steps += 1
+        if self.steps - self.index[-1][0] >= self.every:
+            self._keyframe()
+
+    def _on_change(self, i, old, new):
+        if new == self.initial[i]:
+            self.changed.pop(i, None)
+        else:
+            self.changed[i] = new
+        out = bytearray([EV_CELL])
+        _put(out, _zigzag(i - self.prev))
+        _put(out, new)
+        self.prev = i
+        self._write(out)
+
+    def _keyframe(self):
+        state = self.state
+        out = bytearray([EV_KEYFRAME])
+        _put(out, self.steps)
+        for ids in (sorted(state.frontier), sorted(state.explored)):
+            _put(out, len(ids))
+            prev = 0
+            for i in ids:
+                _put(out, i - prev)
+                prev = i
+        cols = self.grid.cols
+        _put(out, len(state.path))
+        for r, c in state.path:
+            _put(out, r*cols + c)
+        _put(out, len(self.changed))
+        prev = 0
+        for i in sorted(self.changed):
+            _put(out, i - prev)
+            _put(out, self.changed[i])
+            prev = i
+        self.index.append((self.steps, self.pos))
+        self._write(out)
+        self.prev = 0
+
+    def close(self):
+        if self.f.closed:
+            return
+        self.grid.remove_observer(self._on_change)
+        self._write(bytes([EV_END]))
+        index_pos = self.pos
+        out = bytearray()
+        _put(out, self.steps)
+        _put(out, len(self.index))
+        prev_step = prev_pos = 0
+        for step, pos in self.index:
+            _put(out, step - prev_step)
+            _put(out, pos - prev_pos)
+            prev_step, prev_pos = step, pos
+        self._write(out)
+        self._write(struct.pack("<Q", index_pos) + MAGIC)
+        self.f.write(self.buf)
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record(grid, algorithm, path, seed=None, dyn_prob=0.0, max_steps=None,
+           keyframe_every=1024, **opts):
+    """Run one search the way the GUI does and trace it; returns the step count.
+
+    With ``dyn_prob`` a dynamic obstacle spawns after each step with that
+    probability. All randomness comes from ``random.Random(seed)``, so the
+    same seed and grid give the same trace. The grid keeps the spawned
+    obstacles afterwards.
+    """
+    if seed is not None:
+        grid.rng = random.Random(seed)
+    with TraceWriter(path, grid, algorithm, seed, keyframe_every) as tw:
+        for step in make_search(grid, algorithm, **opts):
+            tw.step(step)
+            if step.path or (max_steps is not None and tw.steps >= max_steps):
+                break
+            if dyn_prob and grid.rng.random() < dyn_prob:
+                grid.spawn_dynamic()
+    return tw.steps
+
+
+# ─────────────────────────────────────────────
+#  READER
+# ─────────────────────────────────────────────
+class TraceFrame:
+    """Search state after ``step`` steps: a Grid plus its SearchState."""
+
+    def __init__(self, step, grid, state):
+        self.step  = step
+        self.grid  = grid
+        self.state = state
+
+    def render(self):
+        """Text picture: # wall, x obstacle, * path, o frontier, : explored."""
+        grid, state = self.grid, self.state
+        rows = []
+        for r in range(grid.rows):
+            row = []
+            for c in range(grid.cols):
+                i = r*grid.cols + c
+                if (r, c) == grid.start:
+                    ch = "S"
+                elif (r, c) == grid.target:
+                    ch = "T"
+                elif grid.cells[i] == WALL:
+                    ch = "#"
+                elif grid.cells[i] == DYN_WALL:
+                    ch = "x"
+                elif i in state.path_ids:
+                    ch = "*"
+                elif i in state.frontier:
+                    ch = "o"
+                elif i in state.explored:
+                    ch = ":"
+                else:
+                    ch = "."
+                row.append(ch)
+            rows.append("".join(row))
+        return "\n".join(rows)
+
+
+class TraceReader:
+    """Memory-mapped trace; ``seek(step)`` rebuilds the state at any step."""
+
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        self.buf = buf = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buf[:len(MAGIC)] != MAGIC or buf[-len(MAGIC):] != MAGIC:
+            raise ValueError(f"{path} is not a search trace")
+        pos = len(MAGIC)
+        fields = []
+        for _ in range(6):
+            n, pos = _get(buf, pos)
+            fields.append(n)
+        version, self.rows, self.cols, start, target, seed = fields
+        if version != VERSION:
+            raise ValueError(f"unsupported trace version {version}")
+        self.start  = divmod(start, self.cols)
+        self.target = divmod(target, self.cols)
+        self.seed   = seed - 1 if seed else None
+        n, pos = _get(buf, pos)
+        self.algorithm = buf[pos:pos+n].decode()
+        pos += n
+        self.size = self.rows * self.cols
+        self.initial = buf[pos:pos+self.size]
+
+        index_pos = struct.unpack("<Q", buf[-len(MAGIC)-8:-len(MAGIC)])[0]
+        self.steps, pos = _get(buf, index_pos)
+        count, pos = _get(buf, pos)
+        self.kf_steps, self.kf_pos = [], []
+        step = off = 0
+        for _ in range(count):
+            d, pos = _get(buf, pos)
+            step += d
+            d, pos = _get(buf, pos)
+            off += d
+            self.kf_steps.append(step)
+            self.kf_pos.append(off)
+
+    def __len__(self):
+        return self.steps
+
+    def close(self):
+        self.buf.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _ids(self, pos, prev):
+        buf = self.buf
+        n, pos = _get(buf, pos)
+        ids = []
+        for _ in range(n):
+            d, pos = _get(buf, pos)
+            prev += _unzigzag(d)
+            ids.append(prev)
+        return ids, pos, prev
+
+    def _load_keyframe(self, k):
+        buf = self.buf
+        grid = Grid(self.rows, self.cols)
+        grid.cells[:] = self.initial
+        grid.start, grid.target = self.start, self.target
+        state = SearchState(grid)
+        pos = self.kf_pos[k] + 1
+        step, pos = _get(buf, pos)
+        lists = []
+        for _ in range(2):
+            n, pos = _get(buf, pos)
+            ids, prev = [], 0
+            for _ in range(n):
+                d, pos = _get(buf, pos)
+                prev += d
+                ids.append(prev)
+            lists.append(ids)
+        state.frontier.update(lists[0])
+        state.explored.update(lists[1])
+        n, pos = _get(buf, pos)
+        path = []
+        for _ in range(n):
+            i, pos = _get(buf, pos)
+            path.append(divmod(i, self.cols))
+        state.set_path(path)
+        n, pos = _get(buf, pos)
+        prev = 0
+        for _ in range(n):
+            d, pos = _get(buf, pos)
+            kind, pos = _get(buf, pos)
+            prev += d
+            grid.cells[prev] = kind
+        return TraceFrame(step, grid, state), pos
+
+    def _events(self, pos, prev=0):
+        """Decode events from ``pos``: yields Steps and (cell id, kind) pairs."""
+        buf, cols = self.buf, self.cols
+        while True:
+            tag = buf[pos]
+            pos += 1
+            kind = tag & 3
+            if kind == EV_KEYFRAME:
+                pos = self._skip_keyframe(pos)
+                prev = 0
+            elif kind == EV_CELL:
+                d, pos = _get(buf, pos)
+                new, pos = _get(buf, pos)
+                prev += _unzigzag(d)
+                yield prev, new
+            elif kind == EV_STEP:
+                flags = tag >> 2
+                added, pos, prev = self._ids(pos, prev)
+                removed, pos, prev = self._ids(pos, prev)
+                explored = removed
+                if not flags & F_SAME:
+                    explored, pos, prev = self._ids(pos, prev)
+                path = []
+                if flags & F_PATH:
+                    ids, pos, prev = self._ids(pos, prev)
+                    path = [divmod(i, cols) for i in ids]
+                yield Step(added, removed, explored, path, bool(flags & F_RESET))
+            else:
+                return
+
+    def _skip_keyframe(self, pos):
+        buf = self.buf
+        _, pos = _get(buf, pos)
+        for pairs in (1, 1, 1, 2):
+            n, pos = _get(buf, pos)
+            for _ in range(n * pairs):
+                _, pos = _get(buf, pos)
+        return pos
+
+    def seek(self, step):
+        """TraceFrame after ``step`` steps (0 is the initial state).
+
+        Bisects the keyframe index, then replays the events after that
+        keyframe. Obstacles spawned right after ``step`` belong to it.
+        """
+        step = min(max(step, 0), self.steps)
+        k = bisect_right(self.kf_steps, step) - 1
+        frame, pos = self._load_keyframe(k)
+        cells, state = frame.grid.cells, frame.state
+        for ev in self._events(pos):
+            if isinstance(ev, Step):
+                if frame.step == step:
+                    break
+                state.apply(ev)
+                frame.step += 1
+            else:
+                cells[ev[0]] = ev[1]
+        return frame
+
+    def frames(self):
+        """Every TraceFrame in order, sharing one mutable grid and state."""
+        frame, pos = self._load_keyframe(0)
+        cells, state = frame.grid.cells, frame.state
+        for ev in self._events(pos):
+            if isinstance(ev, Step):
+                yield frame             # its trailing obstacles are applied
+                state.apply(ev)
+                frame.step += 1
+            else:
+                cells[ev[0]] = ev[1]
+        yield frame
+
+
+# ─────────────────────────────────────────────
+#  CLI
+# ─────────────────────────────────────────────
+def _parse_size(text):
+    rows, cols = text.lower().split("x")
+    return int(rows), int(cols)
+
+def _describe(frame):
+    state = frame.state
+    return (f"step {frame.step}: frontier {len(state.frontier)}, "
+            f"explored {len(state.explored)}, path {len(state.path)}")
+
+def replay(reader, out=sys.stdout, commands=sys.stdin):
+    """Interactive scrubbing: Enter/n next, p previous, +k / -k, a step
+    number to jump, q to quit."""
+    step = 0
+    while True:
+        frame = reader.seek(step)
+        print(frame.render(), file=out)
+        print(_describe(frame) + f" / {len(reader)}  [n p +k -k <step> q]", file=out)
+        line = commands.readline()
+        if not line:
+            return
+        cmd = line.strip()
+        if cmd in ("", "n"):
+            step += 1
+        elif cmd == "p":
+            step -= 1
+        elif cmd == "q":
+            return
+        else:
+            try:
+                n = int(cmd)
+            except ValueError:
+                continue
+            step = step + n if cmd[0] in "+-" else n
+        step = min(max(step, 0), len(reader))
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Record and replay search traces.")
+    sub = p.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="run a search and write its trace")
+    src = rec.add_mutually_exclusive_group(required=True)
+    src.add_argument("--map", help="text map file")
+    src.add_argument("--random", type=_parse_size, metavar="ROWSxCOLS")
+    rec.add_argument("--density", type=float, default=0.22)
+    rec.add_argument("--seed", type=int, default=0,
+                     help="seeds the maze and every dynamic obstacle")
+    rec.add_argument("-a", "--algorithm", choices=ALGORITHMS, default="BFS")
+    rec.add_argument("--limit", type=int, default=DLS_LIMIT, help="DLS depth limit")
+    rec.add_argument("--dyn", type=float, default=0.0,
+                     help="obstacle spawn probability per step")
+    rec.add_argument("--max-steps", type=int)
+    rec.add_argument("--keyframe-every", type=int, default=1024)
+    rec.add_argument("-o", "--out", required=True)
+    for name, helptext in (("info", "summarise a trace"),
+                           ("show", "print the state at one step"),
+                           ("replay", "scrub through a trace interactively")):
+        cmd = sub.add_parser(name, help=helptext)
+        cmd.add_argument("trace")
+        if name == "show":
+            cmd.add_argument("--step", type=int, default=-1,
+                             help="step to show (default: the last)")
+    return p
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "record":
+        rng = random.Random(args.seed)
+        if args.map:
+            grid = load_map(args.map)
+        else:
+            grid = Grid(*args.random)
+            grid.random_walls(args.density, rng=rng)
+        opts = {"limit": args.limit} if args.algorithm == "DLS" else {}
+        steps = record(grid, args.algorithm, args.out, seed=args.seed,
+                       dyn_prob=args.dyn, max_steps=args.max_steps,
+                       keyframe_every=args.keyframe_every, **opts)
+        print(f"{steps} steps written to {args.out}", file=sys.stderr)
+        return 0
+
+    with TraceReader(args.trace) as reader:
+        if args.command == "info":
+            size = len(reader.buf)
+            print(f"{reader.algorithm} on {reader.rows}x{reader.cols}, seed {reader.seed}")
+            print(f"{len(reader)} steps, {len(reader.kf_steps)} keyframes, {size} bytes "
+                  f"({size / max(len(reader), 1):.1f} bytes/step)")
+            print(_describe(reader.seek(len(reader))))
+        elif args.command == "show":
+            step = args.step if args.step >= 0 else len(reader)
+            frame = reader.seek(step)
+            print(frame.render())
+            print(_describe(frame))
+        else:
+            replay(reader)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
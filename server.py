@@ -0,0 +1,597 @@
+"""
+AI Pathfinder - Query Server
+Serves path queries to other processes on the box over HTTP/JSON, on a
+localhost TCP port or a Unix socket, with nothing beyond asyncio:
+
+  PUT    /grids/NAME         build or load a grid and keep it resident
+  GET    /grids[/NAME]       list the grids / one grid's size and version
+  DELETE /grids/NAME
+  POST   /grids/NAME/walls   {"add": [[r, c], ...], "remove": [[r, c], ...]}
+  POST   /grids/NAME/path    {"start": [r, c], "target": [r, c], "algorithm": "UCS"}
+  GET    /metrics            latency p50 / p99, queue depth, coalescing, cache
+
+Searches run on a thread pool. BFS / Bidirectional / UCS queries are
+answered from distance fields: concurrent queries from the same start
+share one field computation, and finished fields stay in a FieldCache
+until a wall diff reaches them. Other algorithms run solve(), and
+identical concurrent queries share one run; hierarchical queries reuse
+one ClusterGraph per grid. A wall diff waits for the
+searches running on its grid, and queries that arrive meanwhile wait for
+the diff.
+
+    python server.py --port 8765 --grid demo=200x200
+    curl -X POST localhost:8765/grids/demo/path -d '{"start": [198, 1], "target": [1, 198]}'
+    curl localhost:8765/metrics
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from mazes import generate
+from pathfinder import (CACHEABLE, DLS_LIMIT, FREE, SEARCH_GENS, WALL, FieldCache,
+                        Grid, _parse_size, distance_field, load_map, path_cost, solve)
+
+LATENCY_WINDOW = 10_000     # latest path queries kept for the percentiles
+MAX_BODY = 64 << 20
+MAX_CELLS = 16 << 20        # largest resident grid, in cells
+DEFAULT_MAX_STEPS = 2_000_000
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ─────────────────────────────────────────────
+#  RESIDENT GRIDS
+# ─────────────────────────────────────────────
+def build_grid(spec):
+    """Grid from a PUT body: {"map": FILE}, {"text": MAP} or {"size": "RxC"}
+    with optional "density" / "seed", or "maze": KIND and "params" for a
+    mazes.py generator. "start" / "target" override the endpoints. Grids
+    over MAX_CELLS cells are refused."""
+    if "map" in spec:
+        try:
+            grid = load_map(spec["map"])
+        except OSError as exc:
+            raise HTTPError(400, f"map: {exc}") from None
+        _check_size(grid.rows, grid.cols)
+    elif "text" in spec:
+        if not isinstance(spec["text"], str):
+            raise HTTPError(400, "text: expected a string")
+        lines = [ln.rstrip() for ln in spec["text"].splitlines() if ln.strip()]
+        _check_size(len(lines), max(map(len, lines), default=0))
+        try:
+            grid = Grid.from_text(spec["text"])
+        except ValueError as exc:
+            raise HTTPError(400, f"text: {exc}") from None
+    elif "size" in spec:
+        size = spec["size"]
+        try:
+            rows, cols = _parse_size(size) if isinstance(size, str) else size
+        except (TypeError, ValueError):
+            raise HTTPError(400, f'size: expected "RxC" or [rows, cols], got {size!r}') from None
+        rows, cols = _positive_int(rows, "rows"), _positive_int(cols, "cols")
+        _check_size(rows, cols)
+        seed = spec.get("seed")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            raise HTTPError(400, f"seed: expected an integer, got {seed!r}")
+        if spec.get("maze"):
+            params = spec.get("params", {})
+            if not isinstance(params, dict):
+                raise HTTPError(400, f"params: expected an object, got {params!r}")
+            try:
+                grid = generate(spec["maze"], rows, cols, seed=seed,
+                                connected=True, **params)
+            except (TypeError, ValueError) as exc:
+                raise HTTPError(400, f"maze: {exc}") from None
+        else:
+            density = spec.get("density", 0.22)
+            if (isinstance(density, bool) or not isinstance(density, (int, float))
+                    or not 0 <= density <= 1):
+                raise HTTPError(400, f"density: expected a number in [0, 1], got {density!r}")
+            grid = Grid(rows, cols)
+            grid.random_walls(density, rng=random.Random(seed))
+    else:
+        raise HTTPError(400, 'expected "map", "text" or "size"')
+    for key in ("start", "target"):
+        if key in spec:
+            setattr(grid, key, _cell(grid, spec[key], key))
+    return grid
+
+def _check_size(rows, cols):
+    if rows * cols > MAX_CELLS:
+        raise HTTPError(400, f"{rows}x{cols} grid is over the {MAX_CELLS} cell limit")
+
+def _positive_int(value, what):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise HTTPError(400, f"{what}: expected a positive integer, got {value!r}")
+    return value
+
+def _cell(grid, value, what):
+    try:
+        r, c = value
+        r, c = int(r), int(c)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{what}: expected [row, col], got {value!r}") from None
+    if not grid.in_bounds(r, c):
+        raise HTTPError(400, f"{what}: {(r, c)} is outside the {grid.rows}x{grid.cols} grid")
+    return r, c
+
+
+class GridEntry:
+    """A resident grid and the lock that keeps wall diffs and searches apart.
+
+    Searches hold ``reading()`` while they run on the pool; ``writing()``
+    waits for them to drain and holds new ones back until the diff is in.
+    solve() runs on Grid.with_endpoints copies, so concurrent searches
+    never touch grid.start / target. ``graph`` is the grid's ClusterGraph,
+    built by the first hierarchical query and kept in step with wall diffs
+    from then on. ``index_lock`` covers what the copies still share and
+    update lazily: connectivity refloods and the ClusterGraph caches.
+    """
+
+    def __init__(self, name, grid):
+        self.name   = name
+        self.grid   = grid
+        self.start  = grid.start
+        self.target = grid.target
+        self.readers = 0
+        self.writers = 0
+        self.cond = asyncio.Condition()
+        self.graph  = None
+        self.index_lock = threading.Lock()
+
+    @property
+    def info(self):
+        grid = self.grid
+        return {
+            "name":    self.name,
+            "rows":    grid.rows,
+            "cols":    grid.cols,
+            "free":    grid.free_count(),
+            "version": grid.version,
+            "start":   self.start,
+            "target":  self.target,
+        }
+
+    @asynccontextmanager
+    async def reading(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: not self.writers)
+            self.readers += 1
+        try:
+            yield self.grid
+        finally:
+            async with self.cond:
+                self.readers -= 1
+                self.cond.notify_all()
+
+    @asynccontextmanager
+    async def writing(self):
+        async with self.cond:
+            self.writers += 1
+            await self.cond.wait_for(lambda: not self.readers)
+        try:
+            yield self.grid
+        finally:
+            async with self.cond:
+                self.writers -= 1
+                self.cond.notify_all()
+
+
+# ─────────────────────────────────────────────
+#  SERVER
+# ─────────────────────────────────────────────
+class PathServer:
+    """Named grids, a search pool and the HTTP front end.
+
+    ``dispatch(method, target, body)`` answers one request without any
+    socket, so the server can also be driven in-process.
+    """
+
+    def __init__(self, workers=None, cache_bytes=64 << 20, max_steps=DEFAULT_MAX_STEPS):
+        self.workers   = workers or min(4, os.cpu_count() or 1)
+        self.pool      = ThreadPoolExecutor(self.workers, thread_name_prefix="search")
+        self.cache     = FieldCache(cache_bytes)
+        self.max_steps = max_steps
+        self.grids     = {}
+        self.server    = None
+        self.unix      = None
+        self._inflight = {}                   # key -> future of the shared result
+        self._lock     = threading.Lock()     # guards the pool counters
+        self.queued = self.running = self.peak_queued = 0
+        self.requests = self.errors = self.queries = 0
+        self.computations = self.coalesced = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+
+    # ── worker pool ───────────────────────────
+    def _job(self, fn, args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool, self._job, fn, args)
+
+    async def _shared(self, entry, key, compute):
+        """(result, joined): ``compute(grid)`` is awaited once per ``key``
+        while it runs, and every concurrent caller gets that result."""
+        fut = self._inflight.get(key)
+        if fut is not None and not entry.writers:
+            self.coalesced += 1
+            return await asyncio.shield(fut), True
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            async with entry.reading() as grid:
+                self.computations += 1
+                result = await compute(grid)
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(exc)
+                fut.exception()         # retrieved: there may be no joiners
+            raise
+        else:
+            fut.set_result(result)
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+        return result, False
+
+    # ── queries ───────────────────────────────
+    async def find_path(self, entry, body):
+        grid = entry.grid
+        start  = _cell(grid, body["start"], "start") if "start" in body else entry.start
+        target = _cell(grid, body["target"], "target") if "target" in body else entry.target
+        algorithm = body.get("algorithm", "UCS")
+        backend = body.get("backend")
+        if algorithm not in SEARCH_GENS:
+            raise HTTPError(400, f"unknown algorithm {algorithm!r}; "
+                                 f"choose from {', '.join(SEARCH_GENS)}")
+        t0 = time.perf_counter()
+        self.queries += 1
+        cached = False
+        if algorithm in CACHEABLE and backend is None:
+            weighted = CACHEABLE[algorithm]
+            path = None
+            if not entry.writers:
+                path = self.cache.cached_path(grid, start, target, weighted)
+            if path is not None:
+                cached, joined = True, False
+            elif not (grid.is_free(*start) and grid.is_free(*target)):
+                path, joined = [], False
+            else:
+                async def compute(grid):
+                    field = await self._run(distance_field, grid, start, weighted)
+                    self.cache.store(grid, field)   # no diff while reading
+                    return field
+                field, joined = await self._shared(entry, (entry, weighted, start), compute)
+                path = field.path_to(target)
+            res = {
+                "algorithm": algorithm,
+                "found":     bool(path),
+                "path":      path,
+                "cost":      round(path_cost(path), 4) if path else None,
+                "length":    len(path),
+            }
+        else:
+            opts = {"max_steps": _positive_int(body.get("max_steps", self.max_steps),
+                                               "max_steps")}
+            if algorithm == "DLS":
+                opts["limit"] = _positive_int(body.get("limit", DLS_LIMIT), "limit")
+            async def compute(grid):
+                return await self._run(self._solve, entry, algorithm, backend,
+                                       start, target, opts)
+            key = (entry, algorithm, backend, start, target, tuple(sorted(opts.items())))
+            res, joined = await self._shared(entry, key, compute)
+            res = dict(res)
+        elapsed = time.perf_counter() - t0
+        self.latencies.append(elapsed)
+        res.update(grid=entry.name, start=start, target=target, cached=cached,
+                   coalesced=joined, latency=elapsed)
+        if not body.get("path", True):
+            del res["path"]
+        return res
+
+    @staticmethod
+    def _solve(entry, algorithm, backend, start, target, opts):
+        grid = entry.grid
+        with entry.index_lock:
+            # settle the endpoints' components so solve() only reads them
+            grid.connected(start, target)
+            grid.component_size(start)
+            view = grid.with_endpoints(start, target)
+        if backend != "hierarchical":
+            return solve(view, algorithm, backend=backend, **opts)
+        with entry.index_lock:
+            if entry.graph is None:
+                entry.graph = grid.cluster_graph()
+            return solve(view, algorithm, backend=backend, graph=entry.graph, **opts)
+
+    async def apply_walls(self, entry, body):
+        grid = entry.grid
+        add    = [_cell(grid, c, "add") for c in body.get("add", ())]
+        remove = [_cell(grid, c, "remove") for c in body.get("remove", ())]
+        async with entry.writing() as grid:
+            before = {}
+            for cells, kind in ((add, WALL), (remove, FREE)):
+                for r, c in cells:
+                    i = grid.cell_id(r, c)
+                    before.setdefault(i, grid.cells[i])
+                    grid.set_cell(i, kind)
+            changed = sum(grid.cells[i] != old for i, old in before.items())
+        return {"grid": entry.name, "version": grid.version, "changed": changed}
+
+    # ── metrics ───────────────────────────────
+    @property
+    def metrics(self):
+        times = sorted(self.latencies)
+
+        def pct(q):
+            if not times:
+                return None
+            return times[max(0, math.ceil(q * len(times)) - 1)] * 1000
+
+        return {
+            "uptime":       time.time() - self.started,
+            "requests":     self.requests,
+            "errors":       self.errors,
+            "queries":      self.queries,
+            "computations": self.computations,
+            "coalesced":    self.coalesced,
+            "workers":      self.workers,
+            "queue_depth":  self.queued,
+            "peak_queue_depth": self.peak_queued,
+            "running":      self.running,
+            "latency_ms":   {"p50": pct(0.50), "p99": pct(0.99),
+                             "max": pct(1.0), "window": len(times)},
+            "cache":        self.cache.stats,
+            "grids":        len(self.grids),
+        }
+
+    # ── routing ───────────────────────────────
+    def _entry(self, name):
+        try:
+            return self.grids[name]
+        except KeyError:
+            raise HTTPError(404, f"no grid named {name!r}") from None
+
+    async def _route(self, method, parts, body):
+        if parts == ["metrics"] and method == "GET":
+            return 200, self.metrics
+        if parts == ["grids"] and method == "GET":
+            return 200, {"grids": [e.info for e in self.grids.values()]}
+        if len(parts) == 2 and parts[0] == "grids":
+            name = parts[1]
+            if method == "PUT":
+                grid = await self._run(build_grid, body)
+                self.grids[name] = entry = GridEntry(name, grid)
+                return 201, entry.info
+            if method == "GET":
+                return 200, self._entry(name).info
+            if method == "DELETE":
+                self._entry(name)
+                del self.grids[name]
+                return 200, {"deleted": name}
+        if len(parts) == 3 and parts[0] == "grids" and method == "POST":
+            if parts[2] == "path":
+                return 200, await self.find_path(self._entry(parts[1]), body)
+            if parts[2] == "walls":
+                return 200, await self.apply_walls(self._entry(parts[1]), body)
+        if parts and parts[0] in ("metrics", "grids"):
+            raise HTTPError(405, f"{method} is not supported on /{'/'.join(parts)}")
+        raise HTTPError(404, f"no route /{'/'.join(parts)}")
+
+    async def dispatch(self, method, target, body=b""):
+        """(status, JSON-able payload) for one request."""
+        self.requests += 1
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise HTTPError(400, "expected a JSON object")
+            parts = [p for p in urlsplit(target).path.split("/") if p]
+            status, payload = await self._route(method.upper(), parts, data)
+        except HTTPError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        except ValueError as exc:           # bad JSON, unknown backend / maze, ...
+            status, payload = 400, {"error": str(exc)}
+        except Exception as exc:
+            print(f"{method} {target}: {exc!r}", file=sys.stderr)
+            status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+        if status >= 400:
+            self.errors += 1
+        return status, payload
+
+    # ── HTTP ──────────────────────────────────
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length") from None
+        if length > MAX_BODY:
+            raise HTTPError(413, f"body over {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+        conn = headers.get("connection", "").lower()
+        keep = conn == "keep-alive" or (version == "HTTP/1.1" and conn != "close")
+        return method, target, body, keep
+
+    @staticmethod
+    def _respond(writer, status, payload, keep):
+        data = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as exc:
+                    self.requests += 1
+                    self.errors += 1
+                    self._respond(writer, exc.status, {"error": str(exc)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, body, keep = request
+                status, payload = await self.dispatch(method, target, body)
+                self._respond(writer, status, payload, keep)
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765, unix=None):
+        if unix is not None:
+            self.unix = unix
+            self.server = await asyncio.start_unix_server(self._client, path=unix)
+        else:
+            self.server = await asyncio.start_server(self._client, host, port)
+        return self.server
+
+    @property
+    def address(self):
+        """(host, port) or the Unix socket path the server listens on."""
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.unix is not None and os.path.exists(self.unix):
+            os.unlink(self.unix)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
+
+
+# ─────────────────────────────────────────────
+#  CLIENT
+# ─────────────────────────────────────────────
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+def call(method, path, body=None, host="127.0.0.1", port=8765, unix=None, timeout=60):
+    """One request to a running server: (status, decoded JSON)."""
+    conn = (_UnixConnection(unix, timeout) if unix is not None else
+            http.client.HTTPConnection(host, port, timeout=timeout))
+    try:
+        data = json.dumps(body).encode() if body is not None else None
+        conn.request(method, path, data, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read() or b"null")
+    finally:
+        conn.close()
+
+
+# ─────────────────────────────────────────────
+#  CLI
+# ─────────────────────────────────────────────
+def _parse_grid(text):
+    name, sep, spec = text.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=MAP or NAME=ROWSxCOLS, got {text!r}")
+    try:
+        return name, {"size": _parse_size(spec)}
+    except ValueError:
+        return name, {"map": spec}
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Serve path queries over HTTP/JSON.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    p.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead")
+    p.add_argument("--workers", type=int, help="search threads (default min(4, CPUs))")
+    p.add_argument("--cache-mb", type=int, default=64,
+                   help="memory for cached distance fields (default 64)")
+    p.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+                   help="step cap for algorithms run through solve()")
+    p.add_argument("--grid", type=_parse_grid, action="append", default=[],
+                   metavar="NAME=SPEC",
+                   help="preload a grid from a map file or a ROWSxCOLS random maze; repeatable")
+    p.add_argument("--seed", type=int, help="seed for the --grid random mazes")
+    return p
+
+async def serve(args):
+    server = PathServer(args.workers, args.cache_mb << 20, args.max_steps)
+    for name, spec in args.grid:
+        spec["seed"] = args.seed
+        try:
+            server.grids[name] = GridEntry(name, build_grid(spec))
+        except HTTPError as exc:
+            raise SystemExit(f"--grid {name}: {exc}")
+    await server.start(args.host, args.port, args.unix)
+    where = args.unix or "http://%s:%d" % server.address[:2]
+    print(f"serving {len(server.grids)} grids on {where} ({server.workers} workers)",
+          file=sys.stderr)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())